@@ -1,18 +1,20 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from mutagen import File
-import pygame
-import time
-from mutagen.mp3 import MP3
-from mutagen.mp4 import MP4
-from mutagen.flac import FLAC
-from mutagen.id3 import ID3, TIT2, TPE1, TALB
-import ffmpeg
+import importlib
 import os
+import queue
 import ttkbootstrap as ttk
 from threading import Thread
 import subprocess
 import sys
+import time
+from lrc_document import format_timestamp, lrc_base_name, tag_words, word_spans
+from audio_player import AudioPlayer
+from app_settings import load_settings, save_settings
+from lrc_preview import LyricsPreview
+from lrc_timeline import Timeline
+from waveform_view import WaveformView
+from library_index import track_metadata
 
 # Get the directory of the current script
 BASE_DIR = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
@@ -21,6 +23,23 @@ BASE_DIR = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
 logo_path = os.path.join(BASE_DIR, "Logo5.png")
 icon_path = os.path.join(BASE_DIR, "Logo5.ico")
 
+# Heavy modules are imported on first use (pygame on first play, mutagen on first
+# metadata read, librosa only inside Smart Sync). Once the window is up they are
+# imported on a background thread so first use does not stall either.
+PREWARM_MODULES = ("pygame", "mutagen", "mutagen.easyid3", "mutagen.easymp4", "mutagen.flac")
+PREWARM_DELAY_MS = 200
+AUTO_SYNC_POLL_MS = 50
+PREROLL_MS = 3000  # Play from this long before a line when re-tapping it
+FOLLOW_TICK_MS = 33  # Follow mode re-checks the playback position about 30 times a second
+
+
+def prewarm_modules():
+    for name in PREWARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass  # Reported when the feature is actually used
+
 # def show_splash():
 #     # Path to the splash screen script
 #     splash_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "splash_screen.py")
@@ -36,17 +55,24 @@ class LRCGenerator:
         # Set the window icon
         self.root.iconbitmap(icon_path)
 
-        # Initialize pygame mixer
-        pygame.mixer.init()
+        # Audio playback (m4a files are decoded in the background into a private cache)
+        self.player = AudioPlayer(self.root)
 
         # Variables
         self.audio_path = ""
         self.metadata = {"title": "Unknown", "artist": "Unknown", "album": "Unknown"}
         self.lyrics = []
         self.original_lyrics = []  # Store the original unsynchronized lyrics
+        self.timestamps_ms = []  # Tapped time of each lyric line in ms (None until tapped)
+        self.word_times_ms = []  # Tapped word times of each line in ms (enhanced LRC word mode)
+        self.current_word = 0  # Next word to tap on the current line in word mode
         self.current_line = 0
-        self.start_time = 0
         self.playing = False
+        self.auto_sync_worker = None
+        self.timeline = None  # Line lookup by time for follow mode; rebuilt after timestamps change
+        self.followed_line = None
+        self.follow_tick_id = None
+        self.settings = load_settings()
 
         # Text box font size variable
         self.text_font_size = 12
@@ -120,6 +146,11 @@ class LRCGenerator:
         self.audio_label = ttk.Label(self.root, text="No audio file selected", bootstyle="info")
         self.audio_label.pack(pady=5)
 
+        # Waveform with a marker per timestamped line (scroll to zoom, drag to pan, drag a marker to retime)
+        self.waveform_canvas = tk.Canvas(self.root, height=90)
+        self.waveform_canvas.pack(fill="x", padx=10, pady=5)
+        self.waveform = WaveformView(self.waveform_canvas, on_retime=self.retime_line, on_seek=self.play_from)
+
         # Lyrics text input
         ttk.Label(self.root, text="Enter Lyrics (one line per stanza):", bootstyle="info").pack(pady=5)
         self.lyrics_text = tk.Text(
@@ -140,11 +171,49 @@ class LRCGenerator:
         ttk.Button(button_frame, text="Load Metadata", command=self.load_metadata, bootstyle="primary-outline").pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Play Audio", command=self.play_pause_audio, bootstyle="success-outline").pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Stop Audio", command=self.stop_audio, bootstyle="danger-outline").pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Play From Line", command=self.play_from_line, bootstyle="success-outline").pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Add Timestamp", command=self.add_timestamp, bootstyle="warning-outline").pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Reset Timestamps", command=self.reset_timestamps, bootstyle="secondary-outline").pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Reset", command=self.reset_preview, bootstyle="secondary-outline").pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Save LRC", command=self.save_lrc, bootstyle="info-outline").pack(side=tk.LEFT, padx=5)
 
+        ttk.Button(self.root, text="Calibrate Tap Latency", command=self.calibrate_tap_latency, bootstyle="secondary-outline").pack(pady=5)
+
+        # Auto sync: draft every line timing from the audio, then correct by re-tapping
+        auto_sync_frame = ttk.Frame(self.root)
+        auto_sync_frame.pack(pady=5)
+        self.auto_sync_button = ttk.Button(auto_sync_frame, text="Auto Sync Draft", command=self.auto_sync_draft, bootstyle="primary-outline")
+        self.auto_sync_button.pack(side=tk.LEFT, padx=5)
+        self.auto_sync_cancel = ttk.Button(auto_sync_frame, text="Cancel", command=self.cancel_auto_sync, bootstyle="danger-outline", state="disabled")
+        self.auto_sync_cancel.pack(side=tk.LEFT, padx=5)
+        self.auto_sync_status = ttk.Label(auto_sync_frame, text="", bootstyle="info")
+        self.auto_sync_status.pack(side=tk.LEFT, padx=5)
+
+        # Word mode: every tap stamps the next word (enhanced LRC <mm:ss.xx> tags)
+        self.word_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            self.root, text="Word Timing Mode", variable=self.word_mode,
+            command=self.toggle_word_mode, bootstyle="round-toggle"
+        ).pack(pady=5)
+
+        # Follow mode: during playback the line being sung is highlighted in both text boxes
+        self.follow = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            self.root, text="Follow Playback", variable=self.follow,
+            command=self.toggle_follow, bootstyle="round-toggle"
+        ).pack(pady=5)
+
+        # Practice speed: slowed-down copies are rendered in the background when a file is selected
+        speed_frame = ttk.Frame(self.root)
+        speed_frame.pack(pady=5)
+        ttk.Label(speed_frame, text="Speed:", bootstyle="info").pack(side=tk.LEFT, padx=5)
+        self.speed = tk.DoubleVar(value=1.0)
+        for rate in (1.0, 0.75, 0.5):
+            ttk.Radiobutton(
+                speed_frame, text=f"{rate:g}x", value=rate, variable=self.speed,
+                command=self.change_speed, bootstyle="info-toolbutton"
+            ).pack(side=tk.LEFT, padx=2)
+
         # Font scaling buttons
         font_button_frame = ttk.Frame(self.root)
         font_button_frame.pack(pady=10)
@@ -164,6 +233,7 @@ class LRCGenerator:
             font=("Helvetica", self.text_font_size)
         )
         self.preview_text.pack(pady=5)
+        self.preview = LyricsPreview(self.preview_text, self.lyrics_text)
         
     def load_lrc_generator(self):
         """Load the LRC Generator interface."""
@@ -230,116 +300,143 @@ class LRCGenerator:
         self.audio_path = filedialog.askopenfilename(filetypes=[("Audio Files", "*.mp3 *.flac *.m4a")])
         if self.audio_path:
             self.audio_label.config(text=f"Selected: {self.audio_path.split('/')[-1]}")
-            self.load_metadata()
+            self.load_metadata(announce=False)
+            self.waveform.load(self.audio_path)
+            # Decode to the PCM cache (and render the practice speeds) now so playing,
+            # seeking and changing speed are instant later
+            self.stop_audio()
+            self.player.prepare(self.audio_path)
+            self.player.set_rate(1.0)
+            self.speed.set(1.0)
         else:
             messagebox.showerror("Error", "No audio file selected.")
             
-    def load_metadata(self):
+    def load_metadata(self, announce=True):
         if not self.audio_path:
             messagebox.showerror("Error", "No audio file selected.")
             return
     
+        # Tags come from the library index when the file is unchanged since it was indexed
         try:
-            audio_metadata = None
-    
-            if self.audio_path.endswith(".mp3"):
-                audio = MP3(self.audio_path, ID3=ID3)
-                title = audio.tags.get("TIT2", None)
-                artist = audio.tags.get("TPE1", None)
-                album = audio.tags.get("TALB", None)
-                self.metadata = {
-                    "title": title.text[0] if title else "Unknown",
-                    "artist": artist.text[0] if artist else "Unknown",
-                    "album": album.text[0] if album else "Unknown",
-                }
-    
-            elif self.audio_path.endswith(".m4a"):
-                audio = MP4(self.audio_path)
-                self.metadata = {
-                    "title": audio.tags.get("\xa9nam", ["Unknown"])[0],
-                    "artist": audio.tags.get("\xa9ART", ["Unknown"])[0],
-                    "album": audio.tags.get("\xa9alb", ["Unknown"])[0],
-                }
-    
-            elif self.audio_path.endswith(".flac"):
-                audio = FLAC(self.audio_path)
-                self.metadata = {
-                    "title": audio.get("title", ["Unknown"])[0],
-                    "artist": audio.get("artist", ["Unknown"])[0],
-                    "album": audio.get("album", ["Unknown"])[0],
-                }
-    
-            else:
-                self.metadata = {
-                    "title": "Unknown",
-                    "artist": "Unknown",
-                    "album": "Unknown",
-                }
-    
+            self.metadata = track_metadata(self.audio_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load metadata: {e}")
+            return
+
+        self.audio_label.config(
+            text=f"Selected: {self.audio_path.split('/')[-1]} "
+            f"({self.metadata['artist']} - {self.metadata['title']})"
+        )
+        if announce:
             messagebox.showinfo(
                 "Metadata Loaded",
                 f"Title: {self.metadata['title']}\n"
                 f"Artist: {self.metadata['artist']}\n"
                 f"Album: {self.metadata['album']}",
             )
-    
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load metadata: {e}")
 
     def play_pause_audio(self):
         if not self.audio_path:
             messagebox.showerror("Error", "No audio file selected.")
             return
     
-        # Check if the file is an .m4a file
-        if self.audio_path.endswith(".m4a"):
-            # Convert .m4a to .wav using ffmpeg
-            wav_path = self.audio_path.rsplit(".", 1)[0] + "_converted.wav"
-            try:
-                # If the converted file already exists, reuse it
-                if not os.path.exists(wav_path):
-                    ffmpeg.input(self.audio_path).output(wav_path).run(overwrite_output=True)
-                self.audio_path = wav_path
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to convert .m4a file: {e}")
-                return
-    
-        # Load and play the audio file
+        # Play from the start; timestamps come from the player's position
+        self.play_from(0)
+
+    def play_from(self, position_ms):
+        """Play from position_ms (seeking in the decoded audio, no reload)."""
+        if not self.audio_path:
+            messagebox.showerror("Error", "No audio file selected.")
+            return
         try:
-            pygame.mixer.music.load(self.audio_path)
-            pygame.mixer.music.play()
-            self.start_time = time.time()
-            self.playing = True
+            self.player.play(self.audio_path, on_start=self.on_playback_started, start_ms=position_ms)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to play audio: {e}")
+
+    def play_from_line(self):
+        """Re-tap from the line under the lyrics cursor; playback starts a little before it.
+
+        Other lines keep their timestamps; each tap from here on replaces the
+        timestamp of the line it lands on.
+        """
+        if not self.audio_path:
+            messagebox.showerror("Error", "No audio file selected.")
+            return
+        self.load_lyrics()
+        if not self.lyrics:
+            return
+        index = int(self.lyrics_text.index(tk.INSERT).split(".")[0]) - 1
+        index = min(max(index, 0), len(self.lyrics) - 1)
+
+        # The line's own time, or the last timed line before it
+        anchor_ms = next(
+            (self.timestamps_ms[i] for i in range(index, -1, -1) if self.timestamps_ms[i] is not None), 0
+        )
+        self.current_line = index
+        self.current_word = 0
+        self.preview.highlight(index)
+        spans = word_spans(self.original_lyrics[index]) if self.word_mode.get() else []
+        self.preview.highlight_word(index if spans else None, spans[0] if spans else None)
+        self.preview.scroll_to(index)
+        self.play_from(max(anchor_ms - PREROLL_MS, 0))
+
+    def change_speed(self):
+        """Switch to the selected practice speed; taps keep landing in original-track time."""
+        rate = self.speed.get()
+        if not self.audio_path:
+            self.speed.set(self.player.rate)
+            messagebox.showerror("Error", "No audio file selected.")
+            return
+        try:
+            ready, progress = self.player.rate_ready(rate)
+        except Exception as e:
+            self.speed.set(self.player.rate)
+            messagebox.showerror("Error", f"Failed to prepare {rate:g}x audio: {e}")
+            return
+        if not ready or not self.player.set_rate(rate):
+            self.speed.set(self.player.rate)
+            messagebox.showinfo("Speed", f"{rate:g}x audio is still being prepared ({progress:.0%}). Try again shortly.")
+
+    def on_playback_started(self):
+        self.playing = True
             
     def stop_audio(self):
         # Stop the audio playback
-        if pygame.mixer.music.get_busy():
-            pygame.mixer.music.stop()
+        if self.player.busy():
+            self.player.stop()
             self.playing = False  # Update the playing state
             
     def reset_preview(self):
         """Clear the preview LRC text box and reset original lyrics."""
-        self.preview_text.config(state="normal")
-        self.preview_text.delete(1.0, tk.END)
-        self.preview_text.config(state="disabled")
+        self.preview.render([])
         
         # Reset the original lyrics and related variables
         self.original_lyrics = []
         self.lyrics = []
+        self.timestamps_ms = []
+        self.word_times_ms = []
+        self.timeline = None
         self.current_line = 0
-        self.start_time = 0
+        self.current_word = 0
+        self.waveform.set_markers([])
         
         # Clear the lyrics input text box
         self.lyrics_text.delete(1.0, tk.END)
         
         messagebox.showinfo("Reset", "Preview LRC and lyrics have been cleared.")
 
-    def add_timestamp(self):
+    def load_lyrics(self):
+        """Take the lyrics from the text box when tapping starts (once per set of lyrics)."""
         if not self.lyrics:
             self.original_lyrics = self.lyrics_text.get("1.0", tk.END).strip().split("\n")
             self.lyrics = self.original_lyrics.copy()
+            self.timestamps_ms = [None] * len(self.lyrics)
+            self.word_times_ms = [[] for _ in self.lyrics]
+            self.timeline = None
+            self.update_preview()
+
+    def add_timestamp(self):
+        self.load_lyrics()
     
         # Skip over empty lines
         while self.current_line < len(self.lyrics) and not self.lyrics[self.current_line].strip():
@@ -349,38 +446,31 @@ class LRCGenerator:
             messagebox.showinfo("Completed", "All lines have been synchronized.")
             return
     
-        elapsed_time = time.time() - self.start_time
-        minutes = int(elapsed_time // 60)
-        seconds = int(elapsed_time % 60)
-        milliseconds = int((elapsed_time - int(elapsed_time)) * 100)
-        timestamp = f"[{minutes:02}:{seconds:02}.{milliseconds:02}]"
-    
-        # Add timestamp to the current line
-        self.lyrics[self.current_line] = f"{timestamp}{self.lyrics[self.current_line]}"
-        self.update_preview()
-    
-        # Highlight the next line in original lyrics
-        self.lyrics_text.tag_remove("highlight", "1.0", tk.END)  # Remove previous highlights
-        if self.current_line + 1 < len(self.lyrics):
-            self.lyrics_text.tag_add("highlight", f"{self.current_line + 2}.0", f"{self.current_line + 2}.end")
-            self.lyrics_text.tag_configure("highlight", underline=True)
-    
-        # Highlight the next line in preview text
-        self.preview_text.tag_remove("highlight", "1.0", tk.END)  # Remove previous highlights
-        if self.current_line + 1 < len(self.lyrics):
-            self.preview_text.tag_add("highlight", f"{self.current_line + 2}.0", f"{self.current_line + 2}.end")
-            self.preview_text.tag_configure("highlight", underline=True)
+        position_ms = self.player.position_ms()
+        if position_ms is None:
+            messagebox.showerror("Error", "Start audio playback before adding timestamps.")
+            return
+
+        # Millisecond precision internally; the LRC output stays in centiseconds. The position is
+        # already in original-track time; at a practice speed the tap delay covers less of the track
+        timestamp_ms = max(position_ms - round(self.tap_latency_ms() * self.player.clock_rate), 0)
+        if self.word_mode.get():
+            self.add_word_timestamp(timestamp_ms)
+            return
+
+        self.timestamps_ms[self.current_line] = timestamp_ms
+        self.word_times_ms[self.current_line] = []
+        self.timeline = None
+        timestamp = f"[{format_timestamp(timestamp_ms)}]"
     
-        # Auto-scroll original lyrics and preview text to show the current line and the next 5 lines
-        self.lyrics_text.see(f"{self.current_line + 1}.0")  # Scroll to the current line
-        for i in range(1, 6):  # Scroll to ensure the next 5 lines are visible
-            if self.current_line + i < len(self.lyrics):
-                self.lyrics_text.see(f"{self.current_line + i + 1}.0")
+        # Add timestamp to the current line (replacing any earlier tap) and redraw only that line
+        self.lyrics[self.current_line] = f"{timestamp}{self.original_lyrics[self.current_line]}"
+        self.preview.update_line(self.current_line, self.lyrics[self.current_line])
+        self.waveform.set_markers(self.timestamps_ms)
     
-        self.preview_text.see(f"{self.current_line + 1}.0")
-        for i in range(1, 6):  # Scroll to ensure the next 5 lines in preview
-            if self.current_line + i < len(self.lyrics):
-                self.preview_text.see(f"{self.current_line + i + 1}.0")
+        # Highlight the next line and keep it plus the following lines in view
+        self.preview.highlight(self.current_line + 1)
+        self.preview.scroll_to(self.current_line)
     
         # Move to the next line
         self.current_line += 1
@@ -389,6 +479,231 @@ class LRCGenerator:
         while self.current_line < len(self.lyrics) and not self.lyrics[self.current_line].strip():
             self.current_line += 1
 
+    def add_word_timestamp(self, timestamp_ms):
+        """Stamp the next word of the current line; the first word also stamps the line."""
+        index = self.current_line
+        spans = word_spans(self.original_lyrics[index])
+        if self.current_word == 0:
+            self.timestamps_ms[index] = timestamp_ms
+            self.word_times_ms[index] = []
+            self.timeline = None
+        self.word_times_ms[index].append(timestamp_ms)
+        self.current_word += 1
+
+        # Rebuild the line from the original text and redraw only that line
+        line_tag = f"[{format_timestamp(self.timestamps_ms[index])}]"
+        self.lyrics[index] = line_tag + tag_words(self.original_lyrics[index], self.word_times_ms[index])
+        self.preview.update_line(index, self.lyrics[index])
+        self.waveform.set_markers(self.timestamps_ms)
+
+        if self.current_word < len(spans):
+            # Mark the word the next tap will stamp
+            self.preview.highlight(index)
+            self.preview.highlight_word(index, spans[self.current_word])
+            self.preview.scroll_to(index)
+            return
+        self.finish_word_line()
+
+    def finish_word_line(self):
+        """Move from a (partly) word-tapped line to the next lyric line."""
+        self.current_word = 0
+        self.preview.highlight_word(None)
+        self.preview.highlight(self.current_line + 1)
+        self.preview.scroll_to(self.current_line)
+        self.current_line += 1
+        while self.current_line < len(self.lyrics) and not self.lyrics[self.current_line].strip():
+            self.current_line += 1
+        if self.current_line < len(self.lyrics):
+            spans = word_spans(self.original_lyrics[self.current_line])
+            self.preview.highlight_word(self.current_line, spans[0] if spans else None)
+
+    def toggle_word_mode(self):
+        # Leaving word mode half way through a line keeps the words tapped so far
+        if not self.word_mode.get() and self.current_word:
+            self.finish_word_line()
+        if not self.word_mode.get():
+            self.preview.highlight_word(None)
+
+    def toggle_follow(self):
+        """Start or stop highlighting the line active at the playback position."""
+        if self.follow_tick_id is not None:
+            self.root.after_cancel(self.follow_tick_id)
+            self.follow_tick_id = None
+        self.followed_line = None
+        if self.follow.get():
+            self.follow_tick()
+        elif self.lyrics:
+            self.preview.highlight(self.current_line)  # Back to the next line to tap
+
+    def follow_tick(self):
+        """Move the highlight when playback crosses into another line.
+
+        Each tick is one binary search in the timeline; the text widgets are
+        only touched when the active line changes.
+        """
+        self.follow_tick_id = None
+        if not self.follow.get() or not self.preview_text.winfo_exists():
+            return
+        position_ms = self.player.position_ms()
+        if position_ms is not None:
+            if self.timeline is None:
+                self.timeline = Timeline.from_line_times(self.timestamps_ms)
+            # Highlight what is heard: the mixer position runs ahead of the speakers
+            audible_ms = position_ms - round(self.player.output_latency_ms() * self.player.clock_rate)
+            index = self.timeline.line_at(audible_ms)
+            if index != self.followed_line:
+                self.followed_line = index
+                self.preview.highlight(index)
+                if index is not None:
+                    self.preview.scroll_to(index)
+        self.follow_tick_id = self.root.after(FOLLOW_TICK_MS, self.follow_tick)
+
+    def auto_sync_draft(self):
+        """Draft a timestamp for every lyric line from the audio on a worker thread."""
+        if not self.audio_path:
+            messagebox.showerror("Error", "No audio file selected.")
+            return
+        lyrics = self.lyrics_text.get("1.0", tk.END).strip().split("\n")
+        if not any(line.strip() for line in lyrics):
+            messagebox.showerror("Error", "No lyrics entered.")
+            return
+        if self.auto_sync_worker is not None:
+            return  # Already running
+
+        from lrc_autosync import AutoSyncWorker  # Pulls in numpy/librosa on first use
+        self.auto_sync_worker = AutoSyncWorker(self.audio_path, lyrics)
+        self.auto_sync_worker.start()
+        self.auto_sync_button.config(state="disabled")
+        self.auto_sync_cancel.config(state="normal")
+        self.auto_sync_status.config(text="Starting analysis...")
+        self.root.after(AUTO_SYNC_POLL_MS, self.poll_auto_sync, self.auto_sync_worker)
+
+    def cancel_auto_sync(self):
+        if self.auto_sync_worker is not None:
+            self.auto_sync_worker.cancel()
+            self.auto_sync_status.config(text="Cancelling...")
+
+    def poll_auto_sync(self, worker):
+        """Tk-loop tick that drains the auto sync worker's messages."""
+        if worker is not self.auto_sync_worker:
+            return
+        if not self.auto_sync_status.winfo_exists():
+            worker.cancel()  # Another tool replaced this screen
+            self.auto_sync_worker = None
+            return
+
+        while True:
+            try:
+                message = worker.messages.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == "progress":
+                if not worker.cancel_requested.is_set():
+                    self.auto_sync_status.config(text=f"{message[1].capitalize()}... {message[2]:.0%}")
+                continue
+
+            self.auto_sync_worker = None
+            self.auto_sync_button.config(state="normal")
+            self.auto_sync_cancel.config(state="disabled")
+            if kind == "done":
+                self.apply_auto_sync(worker.lyrics, message[1])
+                self.auto_sync_status.config(text="Draft ready: re-tap any line that is off")
+            elif kind == "cancelled":
+                self.auto_sync_status.config(text="Cancelled")
+            else:
+                self.auto_sync_status.config(text="Failed")
+                messagebox.showerror("Error", f"Failed to draft timings: {message[1]}")
+            return
+
+        self.root.after(AUTO_SYNC_POLL_MS, self.poll_auto_sync, worker)
+
+    def apply_auto_sync(self, lyrics, times_ms):
+        """Replace the current lyrics with the drafted timings, as if every line had been tapped."""
+        self.original_lyrics = lyrics
+        self.timestamps_ms = times_ms
+        self.word_times_ms = [[] for _ in lyrics]
+        self.timeline = None
+        self.lyrics = [
+            line if ms is None else f"[{format_timestamp(ms)}]{line}"
+            for line, ms in zip(lyrics, times_ms)
+        ]
+        self.current_line = len(self.lyrics)
+        self.current_word = 0
+        self.update_preview()
+        self.waveform.set_markers(self.timestamps_ms)
+
+    def retime_line(self, index, timestamp_ms):
+        """Move line index to timestamp_ms (a dragged waveform marker); its word tags move with it."""
+        if index >= len(self.timestamps_ms) or self.timestamps_ms[index] is None:
+            return
+        delta = timestamp_ms - self.timestamps_ms[index]
+        self.timestamps_ms[index] = timestamp_ms
+        self.word_times_ms[index] = [max(ms + delta, 0) for ms in self.word_times_ms[index]]
+        self.timeline = None
+        line_tag = f"[{format_timestamp(timestamp_ms)}]"
+        if self.word_times_ms[index]:
+            self.lyrics[index] = line_tag + tag_words(self.original_lyrics[index], self.word_times_ms[index])
+        else:
+            self.lyrics[index] = line_tag + self.original_lyrics[index]
+        self.preview.update_line(index, self.lyrics[index])
+
+    def tap_latency_ms(self):
+        """Delay to subtract from every tap: the calibrated value, or the audio output latency."""
+        calibrated = self.settings.get("tap_latency_ms")
+        if calibrated is not None:
+            return calibrated
+        return self.player.output_latency_ms()
+
+    def calibrate_tap_latency(self):
+        """Play a metronome, collect taps along with it and store the median delay."""
+        if self.player.busy():
+            self.stop_audio()
+
+        window = tk.Toplevel(self.root)
+        window.title("Calibrate Tap Latency")
+        window.transient(self.root)
+        ttk.Label(
+            window,
+            text="Press the button (or the space bar) on every click you hear.",
+            bootstyle="info",
+        ).pack(padx=20, pady=10)
+        status = ttk.Label(window, text="")
+        status.pack(pady=5)
+
+        taps = []
+        click_times = self.player.play_click_track(interval_ms=600, beats=16)
+
+        def tap(event=None):
+            position_ms = self.player.position_ms()
+            if position_ms is not None:
+                taps.append(position_ms)
+                status.config(text=f"{len(taps)} taps")
+
+        def finish():
+            # Match every tap to its nearest click, skipping the first two clicks
+            # while the user finds the beat and ignoring stray taps
+            delays = sorted(
+                tap_ms - min(click_times[2:], key=lambda click_ms: abs(click_ms - tap_ms))
+                for tap_ms in taps
+            )
+            delays = [delay for delay in delays if -150 <= delay <= 400]
+            window.destroy()
+            self.player.stop()
+            if len(delays) < 6:
+                messagebox.showerror("Calibration", "Not enough taps to calibrate. Please try again.")
+                return
+            self.settings["tap_latency_ms"] = delays[len(delays) // 2]
+            save_settings(self.settings)
+            messagebox.showinfo(
+                "Calibration", f"Tap latency set to {self.settings['tap_latency_ms']} ms."
+            )
+
+        ttk.Button(window, text="Tap", command=tap, bootstyle="warning-outline", takefocus=False).pack(pady=10)
+        window.bind("<space>", tap)
+        window.focus_set()
+        window.after(click_times[-1] + 1000, finish)
+
     def reset_timestamps(self):
         if not self.original_lyrics:
             messagebox.showinfo("Info", "No lyrics to reset.")
@@ -396,8 +711,13 @@ class LRCGenerator:
 
         # Reset lyrics and synchronization state
         self.lyrics = self.original_lyrics.copy()
+        self.timestamps_ms = [None] * len(self.lyrics)
+        self.word_times_ms = [[] for _ in self.lyrics]
+        self.timeline = None
         self.current_line = 0
+        self.current_word = 0
         self.update_preview()
+        self.waveform.set_markers(self.timestamps_ms)
         messagebox.showinfo("Reset", "Timestamps have been reset.")
 
     def save_lrc(self):
@@ -407,12 +727,7 @@ class LRCGenerator:
     
         # Get the audio file's base name without extension
         if self.audio_path:
-            base_name = self.audio_path.split("/")[-1]
-            if base_name.endswith("_converted.wav"):
-                base_name = base_name.replace("_converted.wav", "")  # Remove "_converted.wav"
-            else:
-                base_name = base_name.rsplit(".", 1)[0]  # Remove the original file extension
-            default_filename = base_name + ".lrc"
+            default_filename = lrc_base_name(self.audio_path) + ".lrc"
         else:
             default_filename = "output.lrc"
     
@@ -448,26 +763,12 @@ class LRCGenerator:
             self.preview_text.config(font=("Helvetica", self.text_font_size))
 
     def update_preview(self):
-        self.preview_text.config(state="normal")
-        self.preview_text.delete(1.0, tk.END)
-        self.preview_text.insert(tk.END, "\n".join(self.lyrics))
-        self.preview_text.config(state="disabled")
+        """Redraw the whole preview (taps only redraw their own line)."""
+        self.preview.render(self.lyrics)
 
     def on_close(self):
-        # Stop audio playback
-        if pygame.mixer.music.get_busy():
-            pygame.mixer.music.stop()
-
-        # Quit the pygame mixer
-        pygame.mixer.quit()
-
-        # Delete the converted WAV file if it exists
-        if hasattr(self, 'audio_path') and self.audio_path.endswith("_converted.wav"):
-            try:
-                os.remove(self.audio_path)
-                print(f"Deleted temporary WAV file: {self.audio_path}")
-            except Exception as e:
-                print(f"Failed to delete temporary WAV file: {e}")
+        # Stop audio playback, cancel any unfinished decode and release the mixer
+        self.player.close()
 
         # Close the application
         self.root.destroy()
@@ -480,6 +781,18 @@ def main():
     # Load the tkinter application
     root = ttk.Window(themename="solar")
     app = LRCGenerator(root)
+
+    # Import the heavy modules in the background once the window is showing
+    root.after(PREWARM_DELAY_MS, lambda: Thread(target=prewarm_modules, daemon=True).start())
+
+    # benchmarks/bench_startup.py: report when the first frame is drawn, then quit
+    if os.environ.get("LRC_STARTUP_PROBE"):
+        def report_first_frame():
+            root.update_idletasks()
+            print(f"first-frame {time.time():.6f}", flush=True)
+            app.on_close()
+        root.after(0, report_first_frame)
+
     root.mainloop()
 
     # Wait for the splash thread to finish
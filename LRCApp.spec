@@ -10,10 +10,27 @@ a = Analysis(
         ('Logo5.ico', '.'),         # Include icon file
         ('Logo5.png', '.'),         # Include logo image
 	('romaji_converter.py', '.'),
+	('romaji_engine.py', '.'),
+	('romaji_rules.py', '.'),
+	('romaji_rules.json', '.'),
 	('lrc_cleaner.py', '.'),
 	('lrc_timing_adjuster.py', '.'),
 	('lrc_time_sync.py', '.'),
 	('lrc_smart_sync.py', '.'),
+	('lrc_document.py', '.'),
+	('lrc_beat_analysis.py', '.'),
+	('disk_cache.py', '.'),
+	('lrc_transforms.py', '.'),
+	('audio_player.py', '.'),
+	('app_settings.py', '.'),
+	('lrc_preview.py', '.'),
+	('lrc_timeline.py', '.'),
+	('library_index.py', '.'),
+	('lrc_profiling.py', '.'),
+	('lrc_autosync.py', '.'),
+	('lrc_album_sync.py', '.'),
+	('waveform_peaks.py', '.'),
+	('waveform_view.py', '.'),
 	('C:\\Users\\srisr\\anaconda3\\Lib\\site-packages\\pykakasi\\data', 'pykakasi/data'),  # Include entire data folder
     ],
     hiddenimports=[],
@@ -0,0 +1,34 @@
+import json
+import os
+
+from disk_cache import app_data_dir
+
+SETTINGS_NAME = "settings.json"
+
+DEFAULTS = {
+    # Measured by the tap calibration: audio output plus reaction delay, in ms
+    "tap_latency_ms": None,
+}
+
+
+def settings_path():
+    return os.path.join(app_data_dir(), SETTINGS_NAME)
+
+
+def load_settings():
+    """User settings merged over the defaults."""
+    settings = dict(DEFAULTS)
+    try:
+        with open(settings_path(), "r", encoding="utf-8") as file:
+            settings.update(json.load(file))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+def save_settings(settings):
+    path = settings_path()
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(settings, file, indent=2)
+    os.replace(temp_path, path)
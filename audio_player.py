@@ -0,0 +1,541 @@
+"""Audio playback for the LRC Generator.
+
+Every file is decoded once on a background thread into 16-bit PCM in a
+private, size-capped cache directory (by libsndfile for the formats it
+reads, such as WAV, FLAC and MP3, so those play without ffmpeg; by ffmpeg
+for the rest, such as m4a), and played by queueing
+one-second chunks of that PCM on a mixer channel from the Tk loop.
+Playback starts as soon as the first chunk is decoded, and because any
+position maps straight to a byte offset, seeking is instant once the
+decode has got there. A finished decode is reused the next time the same
+file is opened.
+"""
+import os
+import struct
+import threading
+import time
+from array import array
+
+from disk_cache import DiskCache, cache_key, file_fingerprint
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+SAMPLE_WIDTH = 2  # 16-bit PCM
+BYTES_PER_SECOND = SAMPLE_RATE * CHANNELS * SAMPLE_WIDTH
+CHUNK_BYTES = BYTES_PER_SECOND  # One second of audio per queued chunk
+FEED_INTERVAL_MS = 50
+MIXER_BUFFER = 512  # Samples per mixer buffer (pygame's default)
+
+PRACTICE_RATES = (0.75, 0.5)  # Slowed-down playback speeds, pre-rendered once per track
+STRETCH_BLOCK_SECONDS = 10.0  # librosa's phase vocoder peaks at ~15 MB per second of audio
+STRETCH_OVERLAP_SECONDS = 0.25  # Rendered twice and crossfaded between blocks
+
+transcode_cache = DiskCache("transcode", max_bytes=2 * 1024 * 1024 * 1024)
+stretch_cache = DiskCache("stretch", max_bytes=2 * 1024 * 1024 * 1024)
+_render_lock = threading.Lock()  # One stretch at a time keeps peak memory to one block
+
+
+def wav_header(data_size):
+    """44-byte PCM WAV header for data_size bytes of audio."""
+    block_align = CHANNELS * SAMPLE_WIDTH
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE", b"fmt ", 16, 1, CHANNELS, SAMPLE_RATE,
+        SAMPLE_RATE * block_align, block_align, SAMPLE_WIDTH * 8, b"data", data_size,
+    )
+
+
+def transcode_key(path):
+    return cache_key(file_fingerprint(path), "wav", SAMPLE_RATE, CHANNELS)
+
+
+class BackgroundDecoder(threading.Thread):
+    """Decodes a file to 16-bit PCM and writes it into the transcode cache.
+
+    The cache key (a hash of the whole file) is worked out on this thread
+    too; when the cache already has the decode, it is served from there.
+    """
+
+    def __init__(self, source_path):
+        super().__init__(daemon=True)
+        self.source_path = source_path
+        self.key = None
+        self.lock = threading.Lock()
+        self.path = None
+        self.written = 0
+        self.finished = threading.Event()
+        self.error = None
+        self.process = None
+        self.cancelled = False
+
+    def run(self):
+        try:
+            self.key = transcode_key(self.source_path)
+            cached = transcode_cache.get(self.key, ".wav")
+            if cached:
+                with self.lock:
+                    self.path = cached
+                    self.written = os.path.getsize(cached) - 44
+                return
+            self.path = transcode_cache.temp_path(".wav")
+            with open(self.path, "wb") as file:
+                # Sizes are patched in once the length is known
+                file.write(wav_header(0))
+                for data in self.pcm_chunks():
+                    if self.cancelled:
+                        break
+                    with self.lock:
+                        file.write(data)
+                        file.flush()
+                        self.written += len(data)
+                file.seek(0)
+                file.write(wav_header(self.written))
+
+            if self.cancelled:
+                raise RuntimeError("decode cancelled")
+            with self.lock:
+                self.path = transcode_cache.commit(self.path, self.key, ".wav")
+        except Exception as e:
+            self.error = e
+            try:
+                if self.path:
+                    os.remove(self.path)
+            except OSError:
+                pass
+        finally:
+            self.finished.set()
+
+    def pcm_chunks(self):
+        """Yield the decoded audio as 16-bit PCM at SAMPLE_RATE with CHANNELS channels."""
+        from lrc_beat_analysis import can_stream  # numpy/soundfile only once a file is opened
+
+        if can_stream(self.source_path):
+            return self.soundfile_chunks()
+        return self.ffmpeg_chunks()
+
+    def soundfile_chunks(self):
+        import numpy as np
+        import soundfile
+
+        info = soundfile.info(self.source_path)
+        resampler = None
+        if info.samplerate != SAMPLE_RATE:
+            import soxr
+
+            resampler = soxr.ResampleStream(info.samplerate, SAMPLE_RATE, CHANNELS, dtype="float32")
+
+        def to_pcm(block):
+            return (np.clip(block, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+        frames_per_chunk = CHUNK_BYTES // (CHANNELS * SAMPLE_WIDTH)
+        for block in soundfile.blocks(self.source_path, blocksize=frames_per_chunk, dtype="float32",
+                                      always_2d=True):
+            if block.shape[1] < CHANNELS:
+                block = np.repeat(block[:, :1], CHANNELS, axis=1)
+            block = np.ascontiguousarray(block[:, :CHANNELS])
+            if resampler is not None:
+                block = resampler.resample_chunk(block)
+            yield to_pcm(block)
+        if resampler is not None:
+            yield to_pcm(resampler.resample_chunk(np.zeros((0, CHANNELS), dtype=np.float32), last=True))
+
+    def ffmpeg_chunks(self):
+        import ffmpeg
+
+        try:
+            self.process = (
+                ffmpeg.input(self.source_path)
+                .output("pipe:", format="s16le", acodec="pcm_s16le", ac=CHANNELS, ar=SAMPLE_RATE)
+                .global_args("-loglevel", "error")
+                .run_async(pipe_stdout=True, pipe_stderr=True)
+            )
+        except FileNotFoundError:
+            extension = os.path.splitext(self.source_path)[1] or "this format"
+            raise RuntimeError(f"ffmpeg is needed to play {extension} files but was not found") from None
+        while not self.cancelled:
+            data = self.process.stdout.read(CHUNK_BYTES)
+            if not data:
+                break
+            yield data
+
+        return_code = self.process.wait()
+        if return_code != 0 and not self.cancelled:
+            raise RuntimeError(self.process.stderr.read().decode("utf-8", "replace").strip())
+
+    def read(self, offset, size):
+        """Read decoded PCM bytes [offset, offset + size) that are already available."""
+        with self.lock:
+            size = min(size, self.written - offset)
+            if size <= 0:
+                return b""
+            with open(self.path, "rb") as file:
+                file.seek(44 + offset)  # Skip the WAV header
+                return file.read(size)
+
+    def cancel(self):
+        self.cancelled = True
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+
+
+class StretchRenderer(threading.Thread):
+    """Renders a slowed-down copy of a decode (same pitch) into the stretch cache.
+
+    Waits for the decode to finish (and for any other render), then
+    time-stretches it with librosa's phase vocoder in STRETCH_BLOCK_SECONDS
+    blocks, so memory stays bounded. Each block is rendered with a little of
+    the next one, and that overlap is crossfaded into the start of the next
+    block to hide the seam.
+    """
+
+    def __init__(self, decoder, rate):
+        super().__init__(daemon=True)
+        self.decoder = decoder
+        self.rate = rate
+        self.key = None  # Worked out on this thread, like the decoder's
+        self.path = None
+        self.progress = 0.0
+        self.finished = threading.Event()
+        self.error = None
+        self.cancelled = False
+
+    def run(self):
+        temp_path = None
+        try:
+            self.key = stretch_key(self.decoder.source_path, self.rate)
+            cached = stretch_cache.get(self.key, ".wav")
+            if cached:
+                self.path = cached
+                self.progress = 1.0
+                return
+            self.decoder.finished.wait()
+            if self.decoder.error:
+                raise RuntimeError(f"decode failed: {self.decoder.error}")
+            with _render_lock:
+                temp_path = self.render()
+            self.path = stretch_cache.commit(temp_path, self.key, ".wav")
+        except Exception as e:
+            self.error = e
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+        finally:
+            self.finished.set()
+
+    def render(self):
+        """Write the stretched PCM to a temporary cache file and return its path."""
+        import librosa
+        import numpy as np
+
+        frame_bytes = CHANNELS * SAMPLE_WIDTH
+        total_frames = self.decoder.written // frame_bytes
+        block_frames = int(STRETCH_BLOCK_SECONDS * SAMPLE_RATE)
+        overlap_frames = int(STRETCH_OVERLAP_SECONDS * SAMPLE_RATE)
+        temp_path = stretch_cache.temp_path(".wav")
+        written = 0
+        tail = None
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(wav_header(0))
+                for start in range(0, total_frames, block_frames):
+                    if self.cancelled:
+                        raise RuntimeError("render cancelled")
+                    data = self.decoder.read(start * frame_bytes, (block_frames + overlap_frames) * frame_bytes)
+                    channels = np.frombuffer(data, dtype=np.int16).reshape(-1, CHANNELS).T
+                    stretched = np.stack([
+                        librosa.effects.time_stretch(channel.astype(np.float32) / 32768, rate=self.rate)
+                        for channel in channels
+                    ])
+                    if tail is not None:
+                        n = min(tail.shape[1], stretched.shape[1])
+                        fade = np.linspace(0.0, 1.0, n, dtype=np.float32)
+                        stretched[:, :n] = tail[:, :n] * (1 - fade) + stretched[:, :n] * fade
+                    keep = int(round(min(block_frames, total_frames - start) / self.rate))
+                    body, tail = stretched[:, :keep], stretched[:, keep:]
+                    pcm = (np.clip(body.T, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+                    file.write(pcm)
+                    written += len(pcm)
+                    self.progress = min((start + block_frames) / max(total_frames, 1), 1.0)
+                file.seek(0)
+                file.write(wav_header(written))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return temp_path
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def stretch_key(path, rate):
+    return cache_key(file_fingerprint(path), "stretch", rate, SAMPLE_RATE, CHANNELS)
+
+
+class CachedPCM:
+    """A finished decode from the transcode cache, read like a BackgroundDecoder."""
+
+    def __init__(self, source_path, path):
+        self.source_path = source_path
+        self.path = path
+        self.written = os.path.getsize(path) - 44
+        self.finished = threading.Event()
+        self.finished.set()
+        self.error = None
+
+    def read(self, offset, size):
+        with open(self.path, "rb") as file:
+            file.seek(44 + offset)
+            return file.read(max(min(size, self.written - offset), 0))
+
+    def cancel(self):
+        pass
+
+
+def byte_offset(position_ms):
+    """Byte offset of a position in the decoded PCM, on a whole sample frame."""
+    frame = CHANNELS * SAMPLE_WIDTH
+    return max(int(position_ms) * BYTES_PER_SECOND // 1000 // frame * frame, 0)
+
+
+class AudioPlayer:
+    """Plays audio files from their decoded PCM, from any position, while they are still being decoded.
+
+    At a practice rate below 1 the pre-rendered stretched copy is streamed
+    instead; positions in and out are always in original-track time.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.decoder = None
+        self.source = None  # What is being streamed: the decode or a stretched copy
+        self.rate = 1.0
+        self.clock_rate = 1.0  # Track ms per real ms of what is playing now
+        self.renderers = {}  # rate -> StretchRenderer or CachedPCM of the current file
+        self.channel = None
+        self.stream_offset = 0
+        self.streaming = False
+        self.stream_id = 0
+        self.chunk_offset = 0
+        self.stream_origin = 0.0  # perf_counter() value at stream position zero
+        self.on_start = None
+
+    def ensure_mixer(self):
+        import pygame
+
+        if not pygame.mixer.get_init():
+            pygame.mixer.init(
+                frequency=SAMPLE_RATE, size=-SAMPLE_WIDTH * 8, channels=CHANNELS, buffer=MIXER_BUFFER
+            )
+            pygame.mixer.set_reserved(1)  # Channel 0 is kept for streamed chunks
+        return pygame
+
+    def play(self, path, on_start=None, start_ms=0):
+        """Start playback at start_ms; on_start is called once audio is actually playing."""
+        self.ensure_mixer()
+        self.stop()
+        self.on_start = on_start
+        self.start_stream(path, start_ms)
+
+    def prepare(self, path):
+        """Start decoding path, then rendering its practice speeds, in the background.
+
+        Nothing is redone for files already in the caches, so later seeks and
+        speed changes are instant.
+        """
+        if not self.decoder or self.decoder.source_path != path or self.decoder.error:
+            if self.decoder:
+                self.decoder.cancel()
+            for renderer in self.renderers.values():
+                renderer.cancel()
+            # Cache lookups need a hash of the whole file, so they happen on the worker threads
+            self.decoder = BackgroundDecoder(path)
+            self.decoder.start()
+            self.renderers = {}
+            for rate in PRACTICE_RATES:
+                self.renderers[rate] = StretchRenderer(self.decoder, rate)
+                self.renderers[rate].start()
+
+    def rate_ready(self, rate):
+        """(ready, progress) of the audio for a playback rate."""
+        if rate == 1.0:
+            return True, 1.0
+        renderer = self.renderers.get(rate)
+        if renderer is None:
+            return False, 0.0
+        if isinstance(renderer, StretchRenderer):
+            if renderer.error:
+                raise renderer.error
+            if not renderer.finished.is_set():
+                return False, renderer.progress
+            self.renderers[rate] = renderer = CachedPCM(renderer.decoder.source_path, renderer.path)
+        return True, 1.0
+
+    def set_rate(self, rate):
+        """Switch the playback speed, continuing from the same point of the track if playing.
+
+        Returns False (and changes nothing) while that speed is still being rendered.
+        """
+        if not self.rate_ready(rate)[0]:
+            return False
+        position_ms = self.position_ms()
+        self.rate = rate
+        if position_ms is not None and self.streaming:
+            self.stop()
+            self.start_stream(self.decoder.source_path, position_ms)
+        return True
+
+    def start_stream(self, path, start_ms=0):
+        self.prepare(path)
+        try:
+            ready = self.rate_ready(self.rate)[0]
+        except Exception:
+            ready = False
+        if not ready:
+            self.rate = 1.0  # A newly opened file plays at full speed until its copies are rendered
+        self.source = self.decoder if self.rate == 1.0 else self.renderers[self.rate]
+        self.clock_rate = self.rate
+        self.stream_offset = byte_offset(start_ms / self.rate)
+        self.channel = None
+        self.streaming = True
+        self.stream_id += 1
+        self.feed(self.stream_id)
+
+    def next_chunk(self):
+        """The next decoded chunk, or None while the decoder is still behind."""
+        pygame = self.ensure_mixer()
+        # Also waits here after a seek past what has been decoded so far
+        available = self.source.written - self.stream_offset
+        if available < CHUNK_BYTES and not self.source.finished.is_set():
+            return None
+        data = self.source.read(self.stream_offset, CHUNK_BYTES)
+        if not data:
+            return None
+        self.chunk_offset = self.stream_offset
+        self.stream_offset += len(data)
+        return pygame.mixer.Sound(buffer=data)
+
+    def anchor_stream_clock(self):
+        """The chunk just handed to an idle channel starts playing now."""
+        self.stream_origin = time.perf_counter() - self.chunk_offset / BYTES_PER_SECOND
+
+    def feed(self, stream_id):
+        """Tk-loop tick that keeps the mixer channel supplied with decoded chunks."""
+        if not self.streaming or stream_id != self.stream_id:
+            return
+        if self.source.error:
+            self.streaming = False
+            self.report_error(self.source.error)
+            return
+
+        if self.channel is None:
+            sound = self.next_chunk()
+            if sound is not None:
+                self.channel = self.ensure_mixer().mixer.Channel(0)
+                self.channel.play(sound)
+                self.anchor_stream_clock()
+                self.started()
+        elif self.channel.get_queue() is None:
+            sound = self.next_chunk()
+            if sound is not None:
+                # Queueing on an idle channel (after a decode underrun) starts it immediately
+                idle = not self.channel.get_busy()
+                self.channel.queue(sound)
+                if idle:
+                    self.anchor_stream_clock()
+            elif self.source.finished.is_set() and not self.channel.get_busy():
+                self.streaming = False
+                return
+
+        self.root.after(FEED_INTERVAL_MS, self.feed, stream_id)
+
+    def position_ms(self):
+        """Playback position reported by the mixer in ms, or None when nothing is playing.
+
+        This is the position of the audio handed to the output device; see
+        output_latency_ms() for how far the audible sound lags behind it. At a
+        practice rate it is mapped back to the original track's time.
+        """
+        import pygame
+
+        if not pygame.mixer.get_init():
+            return None
+        if self.channel is not None and (self.streaming or self.channel.get_busy()):
+            return int((time.perf_counter() - self.stream_origin) * 1000 * self.clock_rate)
+        return None
+
+    def output_latency_ms(self):
+        """Delay between the mixer position and the sound leaving the speakers.
+
+        SDL double-buffers the mixer output, so two buffers of the negotiated
+        size are in flight.
+        """
+        import pygame
+
+        init = pygame.mixer.get_init()
+        frequency = init[0] if init else SAMPLE_RATE
+        return 2 * MIXER_BUFFER * 1000 // frequency
+
+    def play_click_track(self, interval_ms, beats, first_beat_ms=1000):
+        """Play a metronome on the reserved channel; returns the click times in ms."""
+        pygame = self.ensure_mixer()
+        self.stop()
+
+        # Frame offsets from ms * SAMPLE_RATE, not ms * (SAMPLE_RATE // 1000): 44 frames per ms
+        # instead of 44.1 would play every click earlier than its returned time, more so each beat
+        def frames(ms):
+            return ms * SAMPLE_RATE // 1000
+
+        click_frames = frames(20)
+        click = array("h", (
+            int(12000 * (1 - i / click_frames) * (1 if (i // 22) % 2 else -1)) for i in range(click_frames)
+        ))
+        click_times = [first_beat_ms + beat * interval_ms for beat in range(beats)]
+        samples = array("h", bytes(frames(click_times[-1] + 500) * CHANNELS * SAMPLE_WIDTH))
+        for click_ms in click_times:
+            start = frames(click_ms) * CHANNELS
+            for channel in range(CHANNELS):
+                samples[start + channel:start + channel + click_frames * CHANNELS:CHANNELS] = click
+
+        self.channel = pygame.mixer.Channel(0)
+        self.channel.play(pygame.mixer.Sound(buffer=samples.tobytes()))
+        self.clock_rate = 1.0
+        self.chunk_offset = 0
+        self.anchor_stream_clock()
+        return click_times
+
+    def started(self):
+        if self.on_start:
+            self.on_start()
+            self.on_start = None
+
+    def report_error(self, error):
+        from tkinter import messagebox
+        messagebox.showerror("Error", f"Failed to decode audio: {error}")
+
+    def busy(self):
+        import pygame
+
+        if not pygame.mixer.get_init():
+            return False
+        return self.streaming or (self.channel is not None and self.channel.get_busy())
+
+    def stop(self):
+        import pygame
+
+        if not pygame.mixer.get_init():
+            return
+        self.streaming = False
+        if self.channel is not None:
+            self.channel.stop()
+            self.channel = None
+
+    def close(self):
+        """Stop playback, abandon unfinished decodes and release the mixer."""
+        import pygame
+
+        self.stop()
+        if self.decoder and not self.decoder.finished.is_set():
+            self.decoder.cancel()
+        for renderer in self.renderers.values():
+            renderer.cancel()
+        if pygame.mixer.get_init():
+            pygame.mixer.quit()
@@ -0,0 +1,149 @@
+"""Tap-to-paint latency of the LRC Generator preview against lyric length.
+
+Replays synthetic taps through the old full-redraw code and through
+LyricsPreview, forcing a repaint after every tap. Timing needs a display;
+--count (the fallback without one) instead records the Text widget calls
+and characters written per tap, which is the work that has to stay flat.
+
+    python benchmarks/bench_preview.py --lines 100 1000 5000
+    python benchmarks/bench_preview.py --count -o preview.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lrc_document import format_timestamp
+from lrc_preview import LyricsPreview
+
+TAPS = 200
+
+
+def synthetic_lyrics(count):
+    return [f"Line {index} of a long medley with some words to render" for index in range(count)]
+
+
+def full_redraw_tap(preview_text, lyrics_text, lyrics, current_line):
+    """What add_timestamp/update_preview did before LyricsPreview."""
+    preview_text.config(state="normal")
+    preview_text.delete(1.0, tk.END)
+    preview_text.insert(tk.END, "\n".join(lyrics))
+    preview_text.config(state="disabled")
+
+    for widget in (lyrics_text, preview_text):
+        widget.tag_remove("highlight", "1.0", tk.END)
+        if current_line + 1 < len(lyrics):
+            widget.tag_add("highlight", f"{current_line + 2}.0", f"{current_line + 2}.end")
+            widget.tag_configure("highlight", underline=True)
+    for widget in (lyrics_text, preview_text):
+        widget.see(f"{current_line + 1}.0")
+        for i in range(1, 6):
+            if current_line + i < len(lyrics):
+                widget.see(f"{current_line + i + 1}.0")
+
+
+class TextRecorder:
+    """Stands in for a tk.Text without a display: counts calls and characters inserted."""
+
+    def __init__(self, *args, **kwargs):
+        self.calls = 0
+        self.characters = 0
+
+    def insert(self, index, text):
+        self.calls += 1
+        self.characters += len(text)
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls += 1
+        return call
+
+
+def replay(root, line_count, incremental, text_class=None):
+    """Median and p95 seconds per tap; with text_class=TextRecorder, mean calls and characters instead."""
+    text_class = text_class or tk.Text
+    lyrics_text = text_class(root, width=60, height=15)
+    preview_text = text_class(root, width=60, height=15)
+    lyrics_text.pack()
+    preview_text.pack()
+    lyrics = synthetic_lyrics(line_count)
+    lyrics_text.insert(tk.END, "\n".join(lyrics))
+    preview = LyricsPreview(preview_text, lyrics_text)
+    preview.render(lyrics)
+    if root is not None:
+        root.update()
+    recorders = (lyrics_text, preview_text)
+    for recorder in recorders if text_class is TextRecorder else ():
+        recorder.calls = recorder.characters = 0
+
+    # Tap lines spread over the whole document
+    step = max(1, line_count // TAPS)
+    latencies = []
+    for current_line in range(0, line_count, step)[:TAPS]:
+        start = time.perf_counter()
+        lyrics[current_line] = f"[{format_timestamp(current_line * 1000)}]{lyrics[current_line]}"
+        if incremental:
+            preview.update_line(current_line, lyrics[current_line])
+            preview.highlight(current_line + 1)
+            preview.scroll_to(current_line)
+        else:
+            full_redraw_tap(preview_text, lyrics_text, lyrics, current_line)
+        if root is not None:
+            root.update_idletasks()
+        latencies.append(time.perf_counter() - start)
+
+    lyrics_text.destroy()
+    preview_text.destroy()
+    if text_class is TextRecorder:
+        taps = len(latencies)
+        return (sum(recorder.calls for recorder in recorders) / taps,
+                sum(recorder.characters for recorder in recorders) / taps)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--count", action="store_true", help="Count widget work per tap instead of timing")
+    parser.add_argument("-o", "--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    root = None
+    if not args.count:
+        try:
+            root = tk.Tk()
+        except tk.TclError as e:
+            print(f"no display available ({e}); counting widget work instead")
+
+    results = []
+    if root is None:
+        print(f"{'lines':>7} {'mode':>12} {'calls/tap':>10} {'chars/tap':>10}")
+    else:
+        print(f"{'lines':>7} {'mode':>12} {'median ms':>10} {'p95 ms':>8}")
+    for line_count in args.lines:
+        for incremental in (False, True):
+            mode = "incremental" if incremental else "full redraw"
+            if root is None:
+                calls, characters = replay(None, line_count, incremental, TextRecorder)
+                results.append({"lines": line_count, "mode": mode, "calls_per_tap": calls,
+                                "characters_per_tap": characters})
+                print(f"{line_count:>7} {mode:>12} {calls:>10.1f} {characters:>10.0f}")
+            else:
+                median, p95 = replay(root, line_count, incremental)
+                results.append({"lines": line_count, "mode": mode, "median_ms": median * 1000,
+                                "p95_ms": p95 * 1000})
+                print(f"{line_count:>7} {mode:>12} {median * 1000:>10.2f} {p95 * 1000:>8.2f}")
+    if root is not None:
+        root.destroy()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"measure": "widget work" if root is None else "seconds", "results": results}, file, indent=2)
+
+if __name__ == "__main__":
+    main()
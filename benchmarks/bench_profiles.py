@@ -0,0 +1,95 @@
+"""Accuracy against speed of the beat analysis profiles, on click tracks with known beats.
+
+Each profile analyses the same synthetic tracks (44.1 kHz stereo, so every
+profile has to resample and downmix) without the cache. Reported per
+profile: analysis time, its ratio to real time, the median and 95th
+percentile distance from each known beat to the nearest detected one, and
+the share of known beats detected within the tolerance.
+
+    python benchmarks/bench_profiles.py
+    python benchmarks/bench_profiles.py --tempos 90 174 --seconds 120 -o profiles.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+from synthetic import write_click_track
+from lrc_beat_analysis import PROFILES, analyze_beats
+
+DEFAULT_TEMPOS = [90.0, 128.0, 174.0]
+DEFAULT_SECONDS = 60
+TRACK_SAMPLE_RATE = 44100
+HIT_TOLERANCE_MS = 50.0  # mir_eval's default beat F-measure window is 70 ms
+
+
+def score(found, known):
+    """Distances (ms) from every known beat to its nearest detected beat."""
+    if not len(found):
+        return np.full(len(known), np.inf)
+    return np.abs(known[:, None] - found[None, :]).min(axis=1) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tempos", type=float, nargs="+", default=DEFAULT_TEMPOS, help="Click track tempos (BPM)")
+    parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS, help="Length of each click track")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--repeat", type=int, default=2, help="Best of this many runs per track")
+    parser.add_argument("-o", "--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = {}
+    with tempfile.TemporaryDirectory() as directory:
+        tracks = []
+        for bpm in args.tempos:
+            path = os.path.join(directory, f"click-{bpm:g}.wav")
+            known = write_click_track(path, args.seconds, bpm=bpm, sr=TRACK_SAMPLE_RATE, channels=2)
+            tracks.append((bpm, path, known))
+
+        # One untimed run so numba compilation is not charged to the first profile
+        analyze_beats(tracks[0][1], args.profiles[0], use_cache=False)
+
+        for name in args.profiles:
+            seconds = 0.0
+            distances = []
+            for bpm, path, known in tracks:
+                best = float("inf")
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    grid = analyze_beats(path, name, use_cache=False)
+                    best = min(best, time.perf_counter() - start)
+                seconds += best
+                distances.append(score(grid.beat_times, known))
+            distances = np.concatenate(distances)
+            audio_seconds = args.seconds * len(tracks)
+            report[name] = {
+                "profile": repr(PROFILES[name]),
+                "seconds": seconds,
+                "realtime_factor": audio_seconds / seconds,
+                "median_error_ms": float(np.median(distances)),
+                "p95_error_ms": float(np.percentile(distances, 95)),
+                "hit_rate": float(np.mean(distances <= HIT_TOLERANCE_MS)),
+            }
+
+    print(f"{'profile':<10} {'seconds':>8} {'x realtime':>11} {'median ms':>10} {'p95 ms':>8} "
+          f"{'hits@' + format(HIT_TOLERANCE_MS, 'g') + 'ms':>11}")
+    for name, entry in report.items():
+        print(f"{name:<10} {entry['seconds']:>8.2f} {entry['realtime_factor']:>11.0f} "
+              f"{entry['median_error_ms']:>10.1f} {entry['p95_error_ms']:>8.1f} {entry['hit_rate']:>11.1%}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Romaji replacement rules: single-scan rule engine against the old five re.sub passes.
+
+    python benchmarks/bench_romaji_rules.py --lines 50000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from romaji_rules import DEFAULT_RULES_PATH, ReplacementRule, RuleEngine
+
+WORDS = ["watashi", "ha", "ashita", "kun", "kimi", "sakura", "hana", "yoru", "sora", "no",
+         "ni", "de", "kokoro", "hashiru", "mahha", "koreha", "aishiteru", "yume", "ga", "to"]
+
+
+def five_pass(romaji_line):
+    """The replacement code RomajiConverter used before the rule engine."""
+    romaji_line = re.sub(r'\bha\b', 'wa', romaji_line)
+    romaji_line = re.sub(r'(?<!\S)ha(?!\S)', 'wa', romaji_line)
+    romaji_line = re.sub(r'(?<=\w)ha(?=\s|$)', lambda m: m.group(0).replace('ha', 'wa'), romaji_line)
+    romaji_line = re.sub(r'\bashita\b', 'asu', romaji_line)
+    romaji_line = re.sub(r'\bkun\b', 'kimi', romaji_line)
+    return romaji_line
+
+
+def synthetic_lines(count, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12))) for _ in range(count)]
+
+
+def best_of(function, lines, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            function(line)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--extra-rules", type=int, nargs="+", default=[0, 50, 500],
+                        help="Extra synthetic rules added to the engine to show scaling")
+    args = parser.parse_args()
+
+    lines = synthetic_lines(args.lines)
+    engine = RuleEngine.from_file(DEFAULT_RULES_PATH)
+    mismatches = sum(engine.apply(line) != five_pass(line) for line in lines)
+    print(f"outputs differing from five-pass version: {mismatches}")
+
+    baseline = best_of(five_pass, lines, args.repeat)
+    print(f"{'five re.sub passes':<28} {baseline * 1000:>9.1f} ms  ({args.lines / baseline:>10.0f} lines/s)")
+
+    for extra in args.extra_rules:
+        rules = list(engine.rules) + [
+            ReplacementRule(f"zq{index:04d}x", "zz", r"\b", r"\b") for index in range(extra)
+        ]
+        scaled = RuleEngine(rules)
+        elapsed = best_of(scaled.apply, lines, args.repeat)
+        label = f"rule engine ({len(rules)} rules)"
+        print(f"{label:<28} {elapsed * 1000:>9.1f} ms  ({args.lines / elapsed:>10.0f} lines/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Startup cost of the LRC Generator: import time per module and time to first frame.
+
+Every measurement runs in a fresh interpreter. Time to first frame needs a
+display and the GUI dependencies; it is skipped otherwise.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_SCRIPT = os.path.join(ROOT, "LRC generator 3.py")
+
+MODULES = [
+    "tkinter", "ttkbootstrap", "pygame", "mutagen", "mutagen.easyid3", "mutagen.easymp4",
+    "mutagen.flac", "ffmpeg", "numpy", "librosa", "pykakasi",
+    "lrc_document", "audio_player", "lrc_preview", "lrc_smart_sync", "romaji_engine", "library_index",
+]
+
+IMPORT_PROBE = (
+    "import sys, time; sys.path.insert(0, {root!r}); start = time.perf_counter(); "
+    "import {module}; print(time.perf_counter() - start)"
+)
+
+
+def import_time(module, runs):
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE.format(root=ROOT, module=module)],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            return None
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(timings)
+
+
+def first_frame_time(runs):
+    timings = []
+    environment = dict(os.environ, LRC_STARTUP_PROBE="1", SDL_AUDIODRIVER="dummy")
+    for _ in range(runs):
+        start = time.time()
+        result = subprocess.run(
+            [sys.executable, APP_SCRIPT], capture_output=True, text=True, env=environment, timeout=120,
+        )
+        lines = [line for line in result.stdout.splitlines() if line.startswith("first-frame ")]
+        if result.returncode != 0 or not lines:
+            return None, (result.stderr.strip().splitlines() or ["unknown error"])[-1]
+        timings.append(float(lines[-1].split()[1]) - start)
+    return min(timings), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="Best of this many runs")
+    args = parser.parse_args()
+
+    print(f"{'module':<16} {'import ms':>10}")
+    for module in MODULES:
+        elapsed = import_time(module, args.runs)
+        shown = "not installed" if elapsed is None else f"{elapsed * 1000:.1f}"
+        print(f"{module:<16} {shown:>10}")
+
+    elapsed, error = first_frame_time(args.runs)
+    if elapsed is None:
+        print(f"time to first frame: skipped ({error})")
+    else:
+        print(f"time to first frame: {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Peak memory of Smart Sync beat analysis against track length.
+
+Each measurement runs in a fresh interpreter so the reported peak RSS
+belongs to that analysis alone.
+
+    python benchmarks/bench_streaming_memory.py --minutes 1 5 15 30 60
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+from lrc_beat_analysis import analyze_beats
+start = time.perf_counter()
+grid = analyze_beats({path!r}, use_cache=False, streaming={streaming})
+elapsed = time.perf_counter() - start
+try:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+except ImportError:
+    import psutil
+    peak_mb = psutil.Process().memory_info().peak_wset / (1024 * 1024)
+print(json.dumps({{"beats": len(grid.beat_times), "seconds": elapsed, "peak_rss_mb": peak_mb}}))
+"""
+
+
+def measure(path, streaming):
+    code = CHILD.format(root=os.path.dirname(HERE), path=path, streaming=streaming)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 5, 15, 30])
+    parser.add_argument("--sample-rate", type=int, default=44100)
+    args = parser.parse_args()
+
+    from synthetic import write_click_track
+
+    print(f"{'minutes':>8} {'mode':>10} {'peak RSS MB':>12} {'seconds':>9} {'beats':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        for minutes in args.minutes:
+            path = os.path.join(directory, f"click_{minutes:g}min.wav")
+            write_click_track(path, minutes * 60, sr=args.sample_rate, channels=2)
+            for streaming in (False, True):
+                result = measure(path, streaming)
+                mode = "streaming" if streaming else "full load"
+                print(f"{minutes:>8g} {mode:>10} {result['peak_rss_mb']:>12.1f} "
+                      f"{result['seconds']:>9.2f} {result['beats']:>7}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
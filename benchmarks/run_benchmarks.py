@@ -0,0 +1,264 @@
+"""Benchmark suite for the core LRC operations on deterministic synthetic input.
+
+Times parse, clean, offset, quantize, serialisation, active-line lookup,
+Smart Sync (beat analysis of a click track with known beats plus
+alignment), romaji conversion and preview rendering. Results are written
+as JSON and compared against benchmarks/baseline.json; anything slower
+than the tolerance is reported as a regression. Runs headless: cases that
+need a display are skipped.
+
+The committed baseline is a reference run (full sizes, Linux, no display,
+so without the preview cases). Timings only compare on the machine that
+recorded them: save your own baseline before the change under test, then
+compare after it.
+
+    python benchmarks/run_benchmarks.py --quick
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py --output results.json --fail-on-regression
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+from synthetic import japanese_lines, lrc_corpus, write_click_track
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000, 1000000]
+QUICK_SIZES = [100, 1000, 10000]
+ROMAJI_MAX_LINES = 10000    # pykakasi is far slower than the LRC operations
+PREVIEW_MAX_LINES = 100000  # Tk text widgets beyond this only measure Tk itself
+CLICK_SECONDS = 60
+CLICK_BPM = 120.0
+TIMELINE_LOOKUPS = 10000  # Per timeline case: about three minutes of one stream at 60 lookups/s
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+DEFAULT_TOLERANCE = 0.25
+
+
+def best_time(function, repeat, setup=None):
+    """Smallest wall time of repeat calls; setup() runs untimed before each call."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        result = function(argument) if setup else function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def lrc_cases(sizes, repeat):
+    from lrc_document import LRCDocument
+    from lrc_timeline import Timeline
+    from lrc_transforms import BandedBeatAlign, BeatAlign, Offset, Quantize
+
+    for size in sizes:
+        text = lrc_corpus(size)
+        yield "parse", size, best_time(lambda: LRCDocument.parse(text), repeat)[0]
+
+        document = LRCDocument.parse(text)
+        yield "clean", size, best_time(document.plain_lyrics, repeat)[0]
+        yield "dumps", size, best_time(document.dumps, repeat)[0]
+
+        fresh = lambda: LRCDocument.parse(text)
+        yield "offset", size, best_time(lambda doc: doc.transform(Offset(-1500)), repeat, fresh)[0]
+        yield "quantize", size, best_time(lambda doc: doc.transform(Quantize(200)), repeat, fresh)[0]
+
+        # Alignment alone, against a beat grid covering the whole corpus
+        last_ms = max(document.times) if len(document.times) else 0
+        beats_ms = list(range(0, last_ms + 2000, int(60000 / CLICK_BPM)))
+        yield "smart sync align", size, best_time(
+            lambda doc: doc.transform(BandedBeatAlign(beats_ms, min_gap_ms=500)), repeat, fresh
+        )[0]
+        yield "greedy beat align", size, best_time(
+            lambda doc: doc.transform(BeatAlign(beats_ms, min_gap_ms=500)), repeat, fresh
+        )[0]
+
+        # Active-line lookups at evenly spread playback positions, one at a time and all at once
+        timeline = Timeline.from_document(document)
+        positions = list(range(0, last_ms + 1, max(last_ms // TIMELINE_LOOKUPS, 1)))[:TIMELINE_LOOKUPS]
+        yield "timeline build", size, best_time(lambda: Timeline.from_document(document), repeat)[0]
+        yield "timeline lookups", size, best_time(lambda: [timeline.line_at(ms) for ms in positions], repeat)[0]
+        yield "timeline vectorized", size, best_time(lambda: timeline.lines_at(positions), repeat)[0]
+
+
+def beat_analysis_case(repeat):
+    """Uncached beat analysis of a click track; also checks the beats were found."""
+    import numpy as np
+    from lrc_beat_analysis import analyze_beats
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "click.wav")
+        known = write_click_track(path, CLICK_SECONDS, bpm=CLICK_BPM)
+        elapsed, grid = best_time(lambda: analyze_beats(path, use_cache=False), repeat)
+    found = grid.beat_times
+    nearest = np.abs(found[:, None] - known[None, :]).min(axis=1) if len(found) else np.zeros(0)
+    return elapsed, {
+        "beats": int(len(found)),
+        "median_error_ms": float(np.median(nearest) * 1000) if len(nearest) else None,
+    }
+
+
+def romaji_cases(sizes, repeat):
+    from romaji_engine import convert_line, convert_text, convert_word
+
+    def clear():
+        convert_line.cache_clear()
+        convert_word.cache_clear()
+
+    convert_text("準備")  # Load the dictionaries outside the timing
+    for size in sizes:
+        if size > ROMAJI_MAX_LINES:
+            continue
+        text = "\n".join(japanese_lines(size))
+        yield "romaji", size, best_time(lambda _: convert_text(text), repeat, clear)[0]
+
+
+def preview_cases(sizes, repeat):
+    import tkinter as tk
+    from lrc_preview import LyricsPreview
+
+    root = tk.Tk()  # Raises TclError without a display
+    try:
+        preview_text = tk.Text(root)
+        lyrics_text = tk.Text(root)
+        preview = LyricsPreview(preview_text, lyrics_text)
+        for size in sizes:
+            if size > PREVIEW_MAX_LINES:
+                continue
+            lines = lrc_corpus(size).splitlines()
+            lyrics_text.delete(1.0, tk.END)
+            lyrics_text.insert(tk.END, "\n".join(lines))
+
+            def render():
+                preview.render(lines)
+                root.update_idletasks()
+
+            yield "preview render", size, best_time(render, repeat)[0]
+
+            def tap():
+                middle = size // 2
+                preview.update_line(middle, lines[middle])
+                preview.highlight(middle + 1)
+                preview.scroll_to(middle)
+                root.update_idletasks()
+
+            yield "preview tap", size, best_time(tap, repeat)[0]
+    finally:
+        root.destroy()
+
+
+def run(sizes, repeat, skip):
+    results = {}
+
+    def record(name, size, seconds, **extra):
+        key = f"{name}/{size}" if size else name
+        entry = {"seconds": seconds}
+        if size:
+            entry["lines_per_second"] = size / seconds if seconds else None
+        entry.update(extra)
+        results[key] = entry
+        print(f"{key:<28} {seconds * 1000:>12.3f} ms", file=sys.stderr)
+
+    def skipped(name, error):
+        results[name] = {"skipped": str(error)}
+        print(f"{name:<28} skipped ({error})", file=sys.stderr)
+
+    for name, size, seconds in lrc_cases(sizes, repeat):
+        record(name, size, seconds)
+
+    if "audio" not in skip:
+        try:
+            seconds, details = beat_analysis_case(repeat)
+            record("smart sync analysis", None, seconds, **details)
+        except ImportError as e:
+            skipped("smart sync analysis", e)
+
+    if "romaji" not in skip:
+        try:
+            for name, size, seconds in romaji_cases(sizes, repeat):
+                record(name, size, seconds)
+        except ImportError as e:
+            skipped("romaji", e)
+
+    if "preview" not in skip:
+        try:
+            for name, size, seconds in preview_cases(sizes, repeat):
+                record(name, size, seconds)
+        except Exception as e:  # tkinter.TclError when there is no display
+            skipped("preview", e)
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print timings against the baseline; returns the keys that got slower than tolerance."""
+    regressions = []
+    print(f"\n{'case':<28} {'baseline ms':>12} {'now ms':>12} {'change':>8}")
+    for key, entry in results.items():
+        previous = baseline.get(key)
+        if "seconds" not in entry or not previous or "seconds" not in previous:
+            continue
+        change = entry["seconds"] / previous["seconds"] - 1.0 if previous["seconds"] else 0.0
+        flag = ""
+        if change > tolerance:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<28} {previous['seconds'] * 1000:>12.3f} {entry['seconds'] * 1000:>12.3f} "
+              f"{change:>+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Corpus sizes in lines")
+    parser.add_argument("--quick", action="store_true", help=f"Only sizes {QUICK_SIZES}")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of this many runs per case")
+    parser.add_argument("--skip", nargs="+", default=[], choices=["audio", "romaji", "preview"])
+    parser.add_argument("-o", "--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Slowdown (fraction) reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on regressions")
+    args = parser.parse_args()
+
+    sizes = QUICK_SIZES if args.quick else args.sizes
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": run(sizes, args.repeat, set(args.skip)),
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    regressions = []
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nBaseline saved to {args.baseline}", file=sys.stderr)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        if (baseline.get("platform"), baseline.get("python")) != (report["platform"], report["python"]):
+            print(f"\nBaseline was recorded on {baseline.get('platform')} (Python {baseline.get('python')}); "
+                  f"run with --save-baseline on this machine for meaningful comparisons", file=sys.stderr)
+        regressions = compare(report["results"], baseline["results"], args.tolerance)
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one", file=sys.stderr)
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
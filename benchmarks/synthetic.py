@@ -0,0 +1,98 @@
+"""Deterministic synthetic inputs for the benchmarks."""
+import random
+import wave
+
+import numpy as np
+
+
+def write_click_track(path, seconds, bpm=120.0, sr=22050, channels=1, block_seconds=30):
+    """Write a 16-bit WAV click track and return the known beat times (seconds).
+
+    The file is written block by block so even hour-long tracks never need
+    to be held in memory by the generator itself.
+    """
+    rng = np.random.default_rng(0)
+    interval = 60.0 / bpm
+    beat_times = np.arange(0.0, seconds, interval)
+
+    click_length = int(0.02 * sr)
+    click = np.sin(2 * np.pi * 1000.0 * np.arange(click_length) / sr) * np.hanning(click_length * 2)[click_length:]
+
+    total = int(seconds * sr)
+    block = int(block_seconds * sr)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sr)
+        for start in range(0, total, block):
+            stop = min(start + block, total)
+            samples = rng.normal(0.0, 0.01, stop - start)
+            first = np.searchsorted(beat_times, (start - click_length) / sr)
+            for beat in beat_times[first:]:
+                onset = int(beat * sr)
+                if onset >= stop:
+                    break
+                lo, hi = max(onset, start), min(onset + click_length, stop)
+                samples[lo - start:hi - start] += 0.8 * click[lo - onset:hi - onset]
+            pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+            if channels > 1:
+                pcm = np.repeat(pcm[:, None], channels, axis=1)
+            wav.writeframes(pcm.tobytes())
+    return beat_times
+
+
+LYRIC_WORDS = ["love", "night", "city", "light", "heart", "rain", "fire", "dream", "away", "home",
+               "never", "always", "running", "falling", "the", "of", "my", "your", "in", "we"]
+CORPUS_WRAP_MS = 100 * 60 * 1000
+JAPANESE_WORDS = ["私は", "明日", "君", "桜", "花", "夜", "空", "の", "に", "で", "心", "走る",
+                  "愛してる", "夢", "が", "と", "東京", "雨", "光", "は"]
+
+
+def _timestamp(ms):
+    minutes, rest = divmod(ms // 10, 6000)
+    return f"{minutes:02}:{rest // 100:02}.{rest % 100:02}"
+
+
+def lrc_corpus(lines, seed=0):
+    """Deterministic LRC text with the given number of lines.
+
+    Besides ordinary timed lines it mixes in metadata lines, multi-timestamp
+    lines (repeated choruses), enhanced lines with <mm:ss.xx> word tags,
+    untimed text and empty timed lines, so every code path is exercised.
+    Time restarts every CORPUS_WRAP_MS, like concatenated songs, so even a
+    million lines stay within realistic (32-bit millisecond) timestamps.
+    """
+    rng = random.Random(seed)
+    header = ["[ti:Synthetic Medley]", "[ar:Benchmark]", "[al:Corpus]", "[by:synthetic.py]", "[offset:+0]"]
+    out = header[:lines]
+    ms = 1000
+    while len(out) < lines:
+        ms += rng.randrange(1500, 4500)
+        if ms > CORPUS_WRAP_MS:
+            ms = 1000 + ms % 1000
+        words = rng.choices(LYRIC_WORDS, k=rng.randrange(3, 9))
+        kind = rng.random()
+        if kind < 0.10:
+            repeat = ms + rng.randrange(60000, 120000)
+            out.append(f"[{_timestamp(ms)}][{_timestamp(repeat)}]{' '.join(words)}")
+        elif kind < 0.20:
+            word_ms = ms
+            tagged = []
+            for word in words:
+                tagged.append(f"<{_timestamp(word_ms)}>{word}")
+                word_ms += rng.randrange(150, 450)
+            out.append(f"[{_timestamp(ms)}]{' '.join(tagged)}")
+        elif kind < 0.23:
+            out.append(" ".join(words))
+        elif kind < 0.25:
+            out.append(f"[{_timestamp(ms)}]")
+        else:
+            out.append(f"[{_timestamp(ms)}]{' '.join(words)}")
+    return "\n".join(out) + "\n"
+
+
+def japanese_lines(count, seed=0):
+    """Deterministic Japanese lyric lines for the romaji conversion."""
+    rng = random.Random(seed)
+    return ["".join(rng.choices(JAPANESE_WORDS, k=rng.randrange(3, 8))) + rng.choice(["", "。"])
+            for _ in range(count)]
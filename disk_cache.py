@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+APP_NAME = "LRCApp"
+HASH_BLOCK_SIZE = 1 << 20
+STALE_PARTIAL_SECONDS = 24 * 60 * 60  # Unfinished entries left behind by a crash
+
+
+def app_data_dir():
+    """Per-user directory for caches and settings."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    path = os.path.join(base, APP_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class ContentHashIndex:
+    """Remembers content hashes by (mtime, size) so unchanged files are never re-read."""
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self.entries = None
+        self.lock = threading.Lock()
+        self.hashing = {}  # path -> lock held while that file is being hashed
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def _save(self):
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.index_path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file)
+        os.replace(temp_path, self.index_path)
+
+    def known_digest(self, path, stat):
+        with self.lock:
+            if self.entries is None:
+                self._load()
+            entry = self.entries.get(path)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                return entry[2]
+            return None
+
+    def digest(self, path):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        digest = self.known_digest(path, stat)
+        if digest is not None:
+            return digest
+
+        # Workers opening the same new file (decode, stretch, peaks) wait for one hash of it
+        with self.lock:
+            hashing = self.hashing.setdefault(path, threading.Lock())
+        with hashing:
+            digest = self.known_digest(path, stat)
+            if digest is not None:
+                return digest
+
+            hasher = hashlib.blake2b(digest_size=16)
+            with open(path, "rb") as file:
+                for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+                    hasher.update(block)
+            digest = hasher.hexdigest()
+
+            with self.lock:
+                self.entries[path] = [stat.st_mtime_ns, stat.st_size, digest]
+                self.hashing.pop(path, None)
+                try:
+                    self._save()
+                except OSError:
+                    pass  # The index is only an optimisation
+        return digest
+
+
+_content_hashes = None
+_content_hashes_lock = threading.Lock()
+
+
+def file_fingerprint(path):
+    """Hash of the file content, validated cheaply against mtime and size."""
+    global _content_hashes
+    with _content_hashes_lock:
+        if _content_hashes is None:
+            _content_hashes = ContentHashIndex(os.path.join(app_data_dir(), "content_hashes.json"))
+    return _content_hashes.digest(path)
+
+
+def cache_key(*parts):
+    """Combine a content fingerprint and analysis parameters into one file-name-safe key."""
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class DiskCache:
+    """Directory of cache files with a total size cap and least-recently-used eviction.
+
+    A hit touches the file's mtime, so eviction simply removes the oldest
+    files first until the directory fits in max_bytes again.
+    """
+
+    def __init__(self, name, max_bytes):
+        self.directory = os.path.join(app_data_dir(), name)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, key, suffix=""):
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key, suffix=""):
+        """Return the cached file path (marking it as recently used) or None."""
+        path = self.path(key, suffix)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def temp_path(self, suffix=""):
+        """A fresh file in the cache directory to write an entry into before commit()."""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".partial-", suffix=suffix)
+        os.close(fd)
+        return temp_path
+
+    def commit(self, temp_path, key, suffix=""):
+        """Atomically publish a finished entry and enforce the size cap."""
+        path = self.path(key, suffix)
+        os.replace(temp_path, path)
+        self.evict()
+        return path
+
+    def evict(self):
+        entries = []
+        total = 0
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            if entry.name.startswith(".partial-"):
+                if now - stat.st_mtime > STALE_PARTIAL_SECONDS:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
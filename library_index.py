@@ -0,0 +1,359 @@
+"""Persistent index of an audio library: tags, duration and the matching LRC file.
+
+    python library_index.py scan ~/Music
+    python library_index.py list --unsynced
+
+Folders are walked with os.scandir and only files whose mtime or size
+changed since the last scan have their tags read, on a thread pool. The
+index lives in an SQLite database in the per-user app data directory, so
+the generator can pre-fill title/artist/album without opening the file.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from disk_cache import app_data_dir
+from lrc_document import TIME_TAG
+
+INDEX_NAME = "library.sqlite3"
+AUDIO_EXTENSIONS = (".mp3", ".flac", ".m4a")
+SCAN_WORKERS = 8
+SYNC_PROBE_BYTES = 64 * 1024  # Enough of an LRC file to find its first timestamp
+UNKNOWN = "Unknown"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    title TEXT,
+    artist TEXT,
+    album TEXT,
+    duration REAL,
+    lrc_path TEXT,
+    lrc_mtime_ns INTEGER,
+    lrc_synced INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS tracks_artist_album ON tracks (artist, album);
+"""
+
+COLUMNS = ("path", "mtime_ns", "size", "title", "artist", "album", "duration",
+           "lrc_path", "lrc_mtime_ns", "lrc_synced", "error")
+
+
+def index_path():
+    return os.path.join(app_data_dir(), INDEX_NAME)
+
+
+def read_tags(path):
+    """Title, artist, album and duration of an audio file; only tags and headers are read."""
+    from mutagen import File
+
+    audio = File(path, easy=True)
+    if audio is None:
+        raise ValueError("unsupported audio format")
+    tags = audio.tags or {}
+
+    def first(key):
+        values = tags.get(key)
+        return str(values[0]) if values else UNKNOWN
+
+    return {
+        "title": first("title"),
+        "artist": first("artist"),
+        "album": first("album"),
+        "duration": getattr(audio.info, "length", None),
+    }
+
+
+def lrc_is_synced(lrc_path):
+    """True when the LRC file has at least one line timestamp."""
+    try:
+        with open(lrc_path, "r", encoding="utf-8-sig", errors="replace") as file:
+            head = file.read(SYNC_PROBE_BYTES)
+    except OSError:
+        return False
+    return any(TIME_TAG.match(line.lstrip()) for line in head.splitlines())
+
+
+def lrc_names_by_stem(names):
+    """Group the .lrc names among names by lower-cased base name, for pick_lrc."""
+    by_stem = {}
+    for name in sorted(names):
+        stem, extension = os.path.splitext(name)
+        if extension.lower() == ".lrc":
+            by_stem.setdefault(stem.lower(), []).append(name)
+    return by_stem
+
+
+def pick_lrc(audio_name, lrc_by_stem):
+    """Name of the LRC file for audio_name: same base name, compared case-insensitively.
+
+    When several differ only in case, the exact-case "<stem>.lrc" wins, then
+    the first in sorted order, so a full scan and a single-file update agree.
+    """
+    stem = os.path.splitext(audio_name)[0]
+    names = lrc_by_stem.get(stem.lower())
+    if not names:
+        return None
+    exact = stem + ".lrc"
+    return exact if exact in names else names[0]
+
+
+def matching_lrc(audio_path):
+    """The .lrc file next to audio_path with the same base name (any case), or None."""
+    directory, audio_name = os.path.split(audio_path)
+    try:
+        names = os.listdir(directory or ".")
+    except OSError:
+        return None
+    name = pick_lrc(audio_name, lrc_names_by_stem(names))
+    return os.path.join(directory, name) if name else None
+
+
+def walk_audio(root_dir):
+    """Yield (audio path, stat, lrc path or None, lrc stat or None) below root_dir.
+
+    Each directory is listed once; LRC files are matched to audio files from
+    the same listing, so no extra lookups are needed per track.
+    """
+    pending = [root_dir]
+    while pending:
+        directory = pending.pop()
+        audio_entries = []
+        lrc_entries = {}  # name -> entry
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                            continue
+                    except OSError:
+                        continue
+                    extension = os.path.splitext(entry.name)[1].lower()
+                    if extension in AUDIO_EXTENSIONS:
+                        audio_entries.append(entry)
+                    elif extension == ".lrc":
+                        lrc_entries[entry.name] = entry
+        except OSError:
+            continue
+        lrc_by_stem = lrc_names_by_stem(lrc_entries)
+
+        for entry in audio_entries:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            lrc_name = pick_lrc(entry.name, lrc_by_stem)
+            lrc_entry = lrc_entries[lrc_name] if lrc_name else None
+            lrc_stat = None
+            if lrc_entry is not None:
+                try:
+                    lrc_stat = lrc_entry.stat()
+                except OSError:
+                    lrc_entry = None
+            yield entry.path, stat, lrc_entry.path if lrc_entry else None, lrc_stat
+
+
+class ScanResult:
+    def __init__(self):
+        self.seen = 0
+        self.read = 0
+        self.lrc_updated = 0
+        self.removed = 0
+        self.failed = 0
+        self.seconds = 0.0
+
+    def __str__(self):
+        return (
+            f"{self.seen} tracks, {self.read} read, {self.lrc_updated} LRC changes, "
+            f"{self.removed} removed, {self.failed} failed in {self.seconds:.2f}s"
+        )
+
+
+class LibraryIndex:
+    """SQLite-backed track index. Use one instance per thread."""
+
+    def __init__(self, path=None):
+        self.path = path or index_path()
+        self.connection = sqlite3.connect(self.path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def scan(self, roots, workers=SCAN_WORKERS, progress=None):
+        """Bring the index up to date for the given folders; returns a ScanResult.
+
+        progress, if given, is called as progress(done, total) while tags are read.
+        """
+        result = ScanResult()
+        start = time.perf_counter()
+        known = {
+            row[0]: (row[1], row[2], row[3], row[4])
+            for row in self.connection.execute(
+                "SELECT path, mtime_ns, size, lrc_path, lrc_mtime_ns FROM tracks"
+            )
+        }
+
+        seen = set()
+        to_read = []
+        lrc_updates = []
+        for root_dir in roots:
+            for path, stat, lrc_path, lrc_stat in walk_audio(os.path.abspath(root_dir)):
+                seen.add(path)
+                lrc_mtime = lrc_stat.st_mtime_ns if lrc_stat else None
+                previous = known.get(path)
+                if previous is None or previous[0] != stat.st_mtime_ns or previous[1] != stat.st_size:
+                    to_read.append((path, stat, lrc_path, lrc_mtime))
+                elif previous[2] != lrc_path or previous[3] != lrc_mtime:
+                    synced = int(lrc_is_synced(lrc_path)) if lrc_path else 0
+                    lrc_updates.append((lrc_path, lrc_mtime, synced, path))
+        result.seen = len(seen)
+
+        def read_entry(item):
+            path, stat, lrc_path, lrc_mtime = item
+            try:
+                tags, error = read_tags(path), None
+            except Exception as e:
+                tags, error = dict.fromkeys(("title", "artist", "album"), UNKNOWN), str(e)
+                tags["duration"] = None
+            synced = int(lrc_is_synced(lrc_path)) if lrc_path else 0
+            return (path, stat.st_mtime_ns, stat.st_size, tags["title"], tags["artist"],
+                    tags["album"], tags["duration"], lrc_path, lrc_mtime, synced, error)
+
+        rows = []
+        if to_read:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for done, row in enumerate(pool.map(read_entry, to_read), 1):
+                    rows.append(row)
+                    if row[-1] is not None:
+                        result.failed += 1
+                    if progress:
+                        progress(done, len(to_read))
+        result.read = len(rows)
+        result.lrc_updated = len(lrc_updates)
+
+        # Tracks under the scanned roots that are gone from disk
+        prefixes = tuple(os.path.join(os.path.abspath(root_dir), "") for root_dir in roots)
+        removed = [(path,) for path in known if path.startswith(prefixes) and path not in seen]
+        result.removed = len(removed)
+
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO tracks ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows,
+            )
+            self.connection.executemany(
+                "UPDATE tracks SET lrc_path = ?, lrc_mtime_ns = ?, lrc_synced = ? WHERE path = ?",
+                lrc_updates,
+            )
+            self.connection.executemany("DELETE FROM tracks WHERE path = ?", removed)
+
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def lookup(self, path):
+        """The indexed row for path as a dict, or None when missing or out of date."""
+        path = os.path.abspath(path)
+        row = self.connection.execute("SELECT * FROM tracks WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if row["mtime_ns"] != stat.st_mtime_ns or row["size"] != stat.st_size:
+            return None
+        return dict(row)
+
+    def update_file(self, path):
+        """Index a single file now (e.g. one just opened in the generator) and return its row."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        tags = read_tags(path)
+        lrc_path = matching_lrc(path)
+        lrc_mtime = os.stat(lrc_path).st_mtime_ns if lrc_path else None
+        row = (path, stat.st_mtime_ns, stat.st_size, tags["title"], tags["artist"], tags["album"],
+               tags["duration"], lrc_path, lrc_mtime, int(lrc_is_synced(lrc_path)) if lrc_path else 0, None)
+        with self.connection:
+            self.connection.execute(
+                f"INSERT OR REPLACE INTO tracks ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                row,
+            )
+        return dict(zip(COLUMNS, row))
+
+    def tracks(self, missing_lrc=False, unsynced=False):
+        """Indexed tracks ordered by artist, album and title."""
+        query = "SELECT * FROM tracks"
+        if missing_lrc:
+            query += " WHERE lrc_path IS NULL"
+        elif unsynced:
+            query += " WHERE lrc_synced = 0"
+        query += " ORDER BY artist, album, title"
+        return [dict(row) for row in self.connection.execute(query)]
+
+
+def track_metadata(path, index=None):
+    """title/artist/album for the generator: from the index when fresh, otherwise read and indexed."""
+    own_index = index is None
+    if own_index:
+        index = LibraryIndex()
+    try:
+        row = index.lookup(path)
+        if row is None:
+            row = index.update_file(path)
+        return {"title": row["title"], "artist": row["artist"], "album": row["album"]}
+    finally:
+        if own_index:
+            index.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index an audio library and its LRC files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = subparsers.add_parser("scan", help="Scan folders and update the index")
+    scan_parser.add_argument("paths", nargs="+", help="Music folders")
+    scan_parser.add_argument("-j", "--jobs", type=int, default=SCAN_WORKERS, help="Tag reader threads")
+
+    list_parser = subparsers.add_parser("list", help="List indexed tracks")
+    which = list_parser.add_mutually_exclusive_group()
+    which.add_argument("--missing-lrc", action="store_true", help="Only tracks without an LRC file")
+    which.add_argument("--unsynced", action="store_true", help="Only tracks without a synced LRC file")
+
+    index_help = "Index database (default: per-user app data directory)"
+    parser.add_argument("--index", help=index_help)
+    for subparser in subparsers.choices.values():
+        # Also accepted after the command; SUPPRESS keeps one given before it
+        subparser.add_argument("--index", default=argparse.SUPPRESS, help=index_help)
+    args = parser.parse_args(argv)
+
+    with LibraryIndex(args.index) as index:
+        if args.command == "scan":
+            print(index.scan(args.paths, workers=args.jobs), file=sys.stderr)
+        else:
+            for track in index.tracks(missing_lrc=args.missing_lrc, unsynced=args.unsynced):
+                state = "synced" if track["lrc_synced"] else ("plain" if track["lrc_path"] else "no lrc")
+                print(f"{state:<7} {track['artist']} - {track['title']}\t{track['path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""Smart Sync for whole albums: every audio/LRC pair re-aligned to its beats in parallel.
+
+    python lrc_album_sync.py ~/Music/Album --in-place
+    python lrc_album_sync.py ~/Music/Album --lyrics ~/Lyrics -o ~/Lyrics-synced --profile fast
+
+Audio files are paired with the LRC file of the same base name (as the
+generator names them, so "song_converted.wav" pairs with "song.lrc"), next
+to the audio or in --lyrics. Each LRC file is synced once: when several
+audio files match it, the original is preferred over a _converted.wav.
+Tracks are analysed in worker processes, longest first, and a track only
+starts while the memory its analysis is expected to need still fits, so
+an album takes about as long as its longest track. Every track gets a CSV report of how far each timestamp
+moved.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from lrc_document import LRCDocument, format_timestamp, lrc_base_name
+from lrc_batch import open_atomic, write_atomic
+from library_index import read_tags
+
+AUDIO_EXTENSIONS = (".mp3", ".flac", ".m4a", ".wav")
+MIN_GAP_MS = 500
+REPORT_SUFFIX = ".sync.csv"
+
+# Peak memory of one analysis: a worker with librosa and numba loaded, plus
+# decoded audio and spectra per second of track (measured on 44.1 kHz stereo)
+WORKER_BASE_BYTES = 300 * 1024 * 1024
+BYTES_PER_AUDIO_SECOND = {"fast": 1024 * 1024, "balanced": int(1.5 * 1024 * 1024)}
+DEFAULT_BYTES_PER_AUDIO_SECOND = 3 * 1024 * 1024  # accurate, and anything unknown
+UNKNOWN_DURATION_SECONDS = 600.0
+MEMORY_SHARE = 0.8  # Of the memory available when the run starts
+
+
+def available_memory():
+    """Bytes of memory currently available, or None when it cannot be told."""
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def track_duration(audio_path):
+    """Length in seconds from the file headers (libsndfile, then mutagen for m4a and the like)."""
+    try:
+        import soundfile
+        return soundfile.info(audio_path).duration
+    except Exception:
+        pass
+    try:
+        duration = read_tags(audio_path)["duration"]
+    except Exception:
+        duration = None
+    return duration or UNKNOWN_DURATION_SECONDS
+
+
+def estimated_memory(duration, profile):
+    """Expected peak bytes of analysing one track; long tracks stream with flat memory."""
+    from lrc_beat_analysis import STREAMING_MIN_SECONDS
+
+    per_second = BYTES_PER_AUDIO_SECOND.get(profile, DEFAULT_BYTES_PER_AUDIO_SECOND)
+    return WORKER_BASE_BYTES + int(min(duration, STREAMING_MIN_SECONDS) * per_second)
+
+
+def is_converted(audio_path):
+    return audio_path.lower().endswith("_converted.wav")
+
+
+def find_pairs(paths, lyrics_dir=None):
+    """(audio path, LRC path) for every LRC file matched by an audio file below paths.
+
+    An LRC file matched by several audio files (say song.m4a and the
+    generator's song_converted.wav) is paired once, preferring an original
+    over a _converted.wav and otherwise the first file found.
+    """
+    lyrics = {}
+    if lyrics_dir:
+        for name in os.listdir(lyrics_dir):
+            if name.lower().endswith(".lrc"):
+                lyrics[name[:-4]] = os.path.join(lyrics_dir, name)
+
+    pairs = {}  # LRC path -> audio path
+    for path in paths:
+        if os.path.isfile(path):
+            candidates = [os.path.abspath(path)]
+        else:
+            candidates = [
+                os.path.join(dirpath, name)
+                for dirpath, _, filenames in os.walk(os.path.abspath(path))
+                for name in sorted(filenames)
+            ]
+        for audio_path in candidates:
+            if not audio_path.lower().endswith(AUDIO_EXTENSIONS):
+                continue
+            base_name = lrc_base_name(audio_path)
+            lrc_path = os.path.join(os.path.dirname(audio_path), base_name + ".lrc")
+            if not os.path.isfile(lrc_path):
+                lrc_path = lyrics.get(base_name)
+            if not lrc_path:
+                continue
+            lrc_path = os.path.abspath(lrc_path)
+            previous = pairs.get(lrc_path)
+            if previous is None or (is_converted(previous) and not is_converted(audio_path)):
+                pairs[lrc_path] = audio_path
+    return [(audio_path, lrc_path) for lrc_path, audio_path in pairs.items()]
+
+
+def movement_rows(document, before):
+    """(line number, before, after, moved ms, text) for every timestamp of the document."""
+    owners = document.line_index_of_times()
+    for line, old, new in zip(owners, before, document.times):
+        yield line + 1, format_timestamp(old), format_timestamp(new), new - old, document.texts[line]
+
+
+def sync_track(job):
+    """Worker entry point: analyse, align and write one track.
+
+    Returns (audio path, error message or None, summary dict).
+    """
+    audio_path, lrc_path, destination, report_path, profile, min_gap_ms = job
+    start = time.perf_counter()
+    try:
+        from array import array
+
+        from lrc_beat_analysis import analyze_beats
+        from lrc_profiling import stage
+        from lrc_transforms import BandedBeatAlign
+
+        with stage("album_sync.track", path=audio_path, profile=profile):
+            beat_times = analyze_beats(audio_path, profile).beat_times
+            document = LRCDocument.load(lrc_path)
+            before = array("i", document.times)
+            document.transform(BandedBeatAlign(beat_times * 1000, min_gap_ms=min_gap_ms))
+            if destination:
+                write_atomic(destination, document.dumps())
+
+            rows = list(movement_rows(document, before))
+            with open_atomic(report_path) as file:
+                writer = csv.writer(file)
+                writer.writerow(["line", "before", "after", "moved_ms", "text"])
+                writer.writerows(rows)
+
+        moves = sorted(abs(row[3]) for row in rows)
+        return audio_path, None, {
+            "timestamps": len(moves),
+            "moved": sum(1 for move in moves if move),
+            "median_move_ms": moves[len(moves) // 2] if moves else 0,
+            "max_move_ms": moves[-1] if moves else 0,
+            "seconds": time.perf_counter() - start,
+        }
+    except Exception as e:
+        return audio_path, f"{type(e).__name__}: {e}", {"seconds": time.perf_counter() - start}
+
+
+def build_jobs(args):
+    """Jobs for every pair, with the duration and memory estimate used for scheduling.
+
+    Raises ValueError when two LRC files would be written to the same output
+    or report file (same name from different folders).
+    """
+    jobs = []
+    writers = {}  # output or report path -> the LRC file it is written for
+    for audio_path, lrc_path in find_pairs(args.paths, args.lyrics):
+        name = os.path.basename(lrc_path)
+        if args.dry_run:
+            destination = None
+        elif args.in_place:
+            destination = lrc_path
+        else:
+            destination = os.path.join(args.output, name)
+        report_dir = args.report or (args.output if args.output else os.path.dirname(lrc_path))
+        report_path = os.path.join(report_dir, name[:-4] + REPORT_SUFFIX)
+        for target in (destination, report_path):
+            if target is None:
+                continue
+            target = os.path.normcase(os.path.abspath(target))
+            other = writers.setdefault(target, lrc_path)
+            if other != lrc_path:
+                raise ValueError(f"{other} and {lrc_path} would both be written to {target}")
+        duration = track_duration(audio_path)
+        job = (audio_path, lrc_path, destination, report_path, args.profile, args.min_gap)
+        jobs.append((duration, estimated_memory(duration, args.profile), job))
+    # Longest first, so the longest track is never the one left running alone at the end
+    jobs.sort(key=lambda entry: -entry[0])
+    return jobs
+
+
+def run(args):
+    try:
+        jobs = build_jobs(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not jobs:
+        print("No audio files with a matching LRC file found", file=sys.stderr)
+        return 1
+
+    budget = args.memory * 1024 * 1024 if args.memory else None
+    if budget is None:
+        available = available_memory()
+        budget = int(available * MEMORY_SHARE) if available else None
+    workers = max(1, min(args.jobs, len(jobs)))
+
+    # One BLAS/numba thread per worker; the processes are the parallelism
+    for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMBA_NUM_THREADS"):
+        os.environ.setdefault(variable, "1")
+
+    start = time.perf_counter()
+    failed = 0
+    pending = list(jobs)
+    running = {}
+    in_use = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            # Start the longest pending tracks that fit; with nothing running, start one regardless
+            while pending and len(running) < workers:
+                fits = [i for i, entry in enumerate(pending) if budget is None or in_use + entry[1] <= budget]
+                if not fits and running:
+                    break
+                duration, memory, job = pending.pop(fits[0] if fits else 0)
+                running[pool.submit(sync_track, job)] = memory
+                in_use += memory
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                in_use -= running.pop(future)
+                audio_path, error, summary = future.result()
+                if error:
+                    failed += 1
+                    print(f"FAILED {audio_path}: {error}", file=sys.stderr)
+                    continue
+                print(
+                    f"{os.path.basename(audio_path)}: {summary['moved']}/{summary['timestamps']} timestamps moved, "
+                    f"median {summary['median_move_ms']} ms, max {summary['max_move_ms']} ms "
+                    f"({summary['seconds']:.1f}s)",
+                    file=sys.stderr,
+                )
+
+    elapsed = time.perf_counter() - start
+    longest = max(duration for duration, _, _ in jobs)
+    print(
+        f"{len(jobs)} tracks ({failed} failed) in {elapsed:.1f}s with {workers} workers; "
+        f"longest track {longest:.0f}s",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    from lrc_beat_analysis import BATCH_PROFILE, PROFILES
+
+    parser = argparse.ArgumentParser(description="Re-sync every audio/LRC pair of an album to its beats.")
+    parser.add_argument("paths", nargs="+", help="Audio files or album folders")
+    parser.add_argument("--lyrics", help="Folder with the LRC files (default: next to the audio)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("-o", "--output", help="Write synced LRC files into this folder")
+    target.add_argument("--in-place", action="store_true", help="Rewrite the LRC files atomically")
+    target.add_argument("-n", "--dry-run", action="store_true", help="Only write the movement reports")
+    parser.add_argument("--report", help="Folder for the per-track CSV reports "
+                                         "(default: the output folder, or next to each LRC file)")
+    parser.add_argument("--profile", default=BATCH_PROFILE, choices=list(PROFILES),
+                        help=f"Beat analysis profile (default: {BATCH_PROFILE})")
+    parser.add_argument("--min-gap", type=int, default=MIN_GAP_MS, help="Minimum gap between lines in ms")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="Most tracks analysed at once (default: number of cores)")
+    parser.add_argument("--memory", type=int, help=f"Memory budget in MB (default: {MEMORY_SHARE:.0%} of available)")
+    args = parser.parse_args(argv)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+"""Automatic line timing: draft an LRC file from plain lyrics and the audio.
+
+    python lrc_autosync.py song.flac lyrics.txt -o song.lrc
+
+The audio is reduced to three per-frame features computed from one mel
+spectrogram (the same block-wise spectrogram Smart Sync streams): energy in
+the vocal band, the share of energy in that band and spectral flux. Their
+combination is thresholded into vocal segments. Every lyric line is then
+placed on a candidate start time (segment starts and flux peaks) by a
+dynamic programme over the "vocal clock", the seconds of detected singing
+so far, so instrumental breaks are free. It balances three costs: distance
+to where the line would start if the lyrics were sung at a constant rate,
+singing between two line starts that disagrees with the line length, and
+skipping strong onsets. When no singing is detected, or there are more
+lines than candidate starts, the lines are instead spread over the track
+by length. The result is a draft to correct, not a finished LRC.
+"""
+import argparse
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+from lrc_beat_analysis import (
+    DEFAULT_HOP_LENGTH, DEFAULT_SAMPLE_RATE, N_FFT, AnalysisCancelled, can_stream, report, stream_mel_blocks,
+)
+from lrc_document import format_timestamp
+from lrc_profiling import stage
+
+STAGE_FEATURES = "features"
+STAGE_SEGMENTS = "segments"
+STAGE_ALIGN = "align"
+
+VOCAL_BAND_HZ = (250.0, 3500.0)
+SMOOTH_SECONDS = 0.3
+THRESHOLD_SHARE = 0.35
+MIN_SEGMENT_SECONDS = 0.25
+MERGE_GAP_SECONDS = 0.35
+PEAK_SPACING_SECONDS = 0.25
+MAX_LINE_SECONDS = 30.0   # Most vocal time considered for one line
+PRIOR_MIN_SECONDS = 4.0
+PRIOR_SHARE = 0.1         # Prior spread as a share of the total vocal time
+
+# Relative weights of the alignment costs
+PRIOR_WEIGHT = 1.0
+DURATION_WEIGHT = 2.0
+ONSET_WEIGHT = 1.0
+
+
+class VocalFeatures:
+    """Per-frame features of one track."""
+
+    def __init__(self, band_db, band_ratio, flux, sr, hop_length):
+        self.band_db = band_db          # vocal band energy in dB
+        self.band_ratio = band_ratio    # vocal band share of the total energy
+        self.flux = flux                # half-wave rectified spectral flux
+        self.sr = sr
+        self.hop_length = hop_length
+
+    @property
+    def frame_seconds(self):
+        return self.hop_length / self.sr
+
+    def __len__(self):
+        return len(self.flux)
+
+
+def mel_blocks(audio_path, sr, hop_length):
+    """Mel power spectrogram blocks; streamed when libsndfile can read the file."""
+    if can_stream(audio_path):
+        yield from stream_mel_blocks(audio_path, sr, hop_length)
+        return
+    import librosa
+
+    y, sr = librosa.load(audio_path, sr=sr)
+    yield librosa.feature.melspectrogram(y=y, sr=sr, n_fft=N_FFT, hop_length=hop_length)
+
+
+def extract_features(audio_path, sr=DEFAULT_SAMPLE_RATE, hop_length=DEFAULT_HOP_LENGTH, progress=None):
+    """Vocal band energy, band ratio and spectral flux for every analysis frame."""
+    import librosa
+
+    frequencies = librosa.mel_frequencies(n_mels=128, fmax=sr / 2)
+    band = (frequencies >= VOCAL_BAND_HZ[0]) & (frequencies <= VOCAL_BAND_HZ[1])
+    duration = librosa.get_duration(path=audio_path)
+    expected_frames = max(1, int(duration * sr / hop_length))
+
+    band_db, band_ratio, flux = [], [], []
+    previous = None
+    frames = 0
+    report(progress, STAGE_FEATURES, 0.0)
+    for mel in mel_blocks(audio_path, sr, hop_length):
+        total = mel.sum(axis=0) + 1e-10
+        vocal = mel[band].sum(axis=0) + 1e-10
+        band_db.append(10.0 * np.log10(vocal))
+        band_ratio.append(vocal / total)
+
+        db = 10.0 * np.log10(np.maximum(mel, 1e-10))
+        if previous is None:
+            previous = db[:, :1]
+        extended = np.concatenate([previous, db], axis=1)
+        flux.append(np.maximum(0.0, np.diff(extended, axis=1)).mean(axis=0))
+        previous = db[:, -1:]
+
+        frames += mel.shape[1]
+        report(progress, STAGE_FEATURES, min(frames / expected_frames, 1.0))
+
+    def joined(parts):
+        # An empty file yields no blocks at all
+        return np.concatenate(parts).astype(np.float32) if parts else np.zeros(0, dtype=np.float32)
+
+    return VocalFeatures(joined(band_db), joined(band_ratio), joined(flux), sr, hop_length)
+
+
+def robust_z(values):
+    median = np.median(values)
+    spread = np.subtract(*np.percentile(values, [75, 25])) or 1.0
+    return (values - median) / spread
+
+
+def smooth(values, frames):
+    if frames <= 1:
+        return values
+    kernel = np.ones(frames) / frames
+    return np.convolve(values, kernel, mode="same")
+
+
+def activity_threshold(values):
+    """Split point between the quiet and the sung parts of the vocal score.
+
+    Taken a fixed share of the way from the quiet level (20th percentile) to
+    the loud level (90th percentile), so lines sung more softly than others
+    still count as vocals.
+    """
+    quiet, loud = np.percentile(values, [20, 90])
+    return quiet + THRESHOLD_SHARE * (loud - quiet)
+
+
+def vocal_activity(features):
+    """Smoothed per-frame vocal score."""
+    frames = max(1, int(round(SMOOTH_SECONDS / features.frame_seconds)))
+    score = (
+        0.5 * robust_z(features.band_db)
+        + 0.3 * robust_z(features.band_ratio)
+        + 0.2 * robust_z(smooth(features.flux, frames))
+    )
+    return smooth(score, frames)
+
+
+def vocal_segments(features, activity=None):
+    """(start, end) frame ranges where the vocal score is above activity_threshold()."""
+    if not len(features):
+        return []
+    if activity is None:
+        activity = vocal_activity(features)
+    if not len(activity):
+        return []
+    active = activity > activity_threshold(activity)
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], active.astype(np.int8), [0]])))
+    segments = list(zip(edges[0::2].tolist(), edges[1::2].tolist()))
+
+    merge_gap = MERGE_GAP_SECONDS / features.frame_seconds
+    merged = []
+    for start, end in segments:
+        if merged and start - merged[-1][1] < merge_gap:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    min_length = MIN_SEGMENT_SECONDS / features.frame_seconds
+    return [(start, end) for start, end in merged if end - start >= min_length]
+
+
+def candidate_starts(features, segments, line_count):
+    """Candidate line start frames with a strength in [0, 1]: segment starts and flux peaks."""
+    spacing = max(1, int(round(PEAK_SPACING_SECONDS / features.frame_seconds)))
+    flux = smooth(features.flux, 3)
+    strength = np.clip(robust_z(flux) / 4.0, 0.0, 1.0)
+
+    candidates = {}
+    for start, end in segments:
+        candidates[start] = 1.0
+        section = flux[start:end]
+        if len(section) < 3:
+            continue
+        # Strongest local maxima first, each blocking its neighbours within `spacing` frames
+        maxima = np.flatnonzero((section[1:-1] >= section[:-2]) & (section[1:-1] > section[2:])) + 1
+        blocked = np.zeros(len(section), dtype=bool)
+        for index in maxima[np.argsort(-section[maxima], kind="stable")].tolist():
+            if blocked[index]:
+                continue
+            candidates.setdefault(start + index, float(strength[start + index]))
+            blocked[max(0, index - spacing + 1):index + spacing] = True
+
+    # Every line needs its own start: fill with a plain grid when there are too few
+    if len(candidates) <= line_count:
+        for frame in range(0, len(features), spacing):
+            candidates.setdefault(frame, 0.0)
+
+    frames = np.array(sorted(candidates), dtype=np.int64)
+    return frames, np.array([candidates[frame] for frame in frames.tolist()])
+
+
+def vocal_clock(segments, frame_count):
+    """Seconds of vocals sung before each frame, counting only frames inside segments."""
+    active = np.zeros(frame_count + 1, dtype=np.float64)
+    for start, end in segments:
+        active[start + 1:end + 1] = 1.0
+    return np.cumsum(active)
+
+
+def line_budget(line_lengths, vocal_seconds):
+    """Expected vocal seconds of each line and the vocal time sung before it.
+
+    The lyrics are assumed to be sung at a constant rate per character over
+    all detected vocal time, which is the line-length prior.
+    """
+    lengths = np.asarray(line_lengths, dtype=np.float64)
+    seconds_per_char = vocal_seconds / max(lengths.sum(), 1.0)
+    durations = lengths * seconds_per_char
+    before = np.concatenate([[0.0], np.cumsum(durations)[:-1]])
+    return before, durations
+
+
+def align_lines(candidate_vocal, candidate_strength, priors, durations):
+    """Pick one increasing candidate per line minimising the total alignment cost.
+
+    All costs are measured on the vocal clock (seconds of detected singing),
+    so instrumental breaks between two lines cost nothing. Per line, a
+    candidate pays for its distance from the line's prior position and earns
+    its onset strength; consecutive lines pay when the singing between them
+    disagrees with the first line's expected duration. Transitions only look
+    back over candidates within a band of vocal time, so the work is
+    O(lines x candidates x band) with the inner loops vectorised.
+    """
+    vocal = np.asarray(candidate_vocal, dtype=np.float64)
+    line_count, candidate_count = len(durations), len(vocal)
+    if not line_count:
+        return np.zeros(0, dtype=np.int64)
+    if candidate_count < line_count:
+        raise ValueError(f"{line_count} lines need at least as many candidates, got {candidate_count}")
+    prior_scale = max(PRIOR_MIN_SECONDS, PRIOR_SHARE * (priors[-1] + durations[-1]))
+    window = max(MAX_LINE_SECONDS, 4.0 * float(durations.max()))
+    band = int(np.max(np.searchsorted(vocal, vocal + window, side="right") - np.arange(candidate_count)))
+    band = max(1, min(band, candidate_count - 1))
+    positions = np.arange(candidate_count)
+
+    def node_cost(i):
+        return PRIOR_WEIGHT * ((vocal - priors[i]) / prior_scale) ** 2 - ONSET_WEIGHT * candidate_strength
+
+    cost = node_cost(0)
+    back = np.zeros((line_count, candidate_count), dtype=np.int32)
+    for i in range(1, line_count):
+        expected = durations[i - 1]
+        tolerance = 0.3 * expected + 0.3
+        best = np.full(candidate_count, np.inf)
+        best_from = np.zeros(candidate_count, dtype=np.int32)
+        for offset in range(1, band + 1):
+            sung = vocal[offset:] - vocal[:-offset]
+            step = cost[:-offset] + DURATION_WEIGHT * ((sung - expected) / tolerance) ** 2
+            better = step < best[offset:]
+            best[offset:][better] = step[better]
+            best_from[offset:][better] = positions[:-offset][better]
+        cost = best + node_cost(i)
+        back[i] = best_from
+
+    if not np.isfinite(cost).any():
+        raise ValueError("no increasing assignment of candidates to lines")
+    chosen = np.empty(line_count, dtype=np.int64)
+    chosen[-1] = int(np.argmin(cost))
+    for i in range(line_count - 1, 0, -1):
+        chosen[i - 1] = back[i, chosen[i]]
+    return chosen
+
+
+def auto_sync(audio_path, lyrics, sr=DEFAULT_SAMPLE_RATE, hop_length=DEFAULT_HOP_LENGTH, progress=None):
+    """Start time in ms for every lyric line (None for blank lines)."""
+    indices = [index for index, line in enumerate(lyrics) if line.strip()]
+    lengths = [len(lyrics[index].strip().replace(" ", "")) + 1 for index in indices]
+
+    with stage("autosync.features", path=audio_path):
+        features = extract_features(audio_path, sr, hop_length, progress)
+    if not len(features):
+        raise ValueError("the audio file has no samples to align the lyrics to")
+
+    report(progress, STAGE_SEGMENTS, 0.0)
+    with stage("autosync.segments", frames=len(features)):
+        segments = vocal_segments(features)
+        frames, strength = candidate_starts(features, segments, len(indices))
+        clock = vocal_clock(segments, len(features)) * features.frame_seconds
+        priors, durations = line_budget(lengths, clock[-1])
+
+    report(progress, STAGE_ALIGN, 0.0)
+    with stage("autosync.align", lines=len(indices), candidates=len(frames)):
+        try:
+            if not segments:
+                raise ValueError("no vocals detected")
+            chosen = align_lines(clock[frames], strength, priors, durations)
+            starts = frames[chosen] * features.frame_seconds
+        except ValueError:
+            # Too many lines for the distinct start times the audio offers (or no singing found):
+            # spread the lines over the whole track by length, still in order, as the draft
+            starts = line_budget(lengths, len(features) * features.frame_seconds)[0]
+    report(progress, STAGE_ALIGN, 1.0)
+
+    times_ms = [None] * len(lyrics)
+    for index, seconds in zip(indices, starts.tolist()):
+        times_ms[index] = int(round(seconds * 1000))
+    return times_ms
+
+
+class AutoSyncWorker(threading.Thread):
+    """Runs auto_sync() off the Tk thread.
+
+    Posts ("progress", stage, fraction), ("done", times_ms), ("cancelled",)
+    or ("error", exception) to self.messages, like Smart Sync's worker.
+    """
+
+    def __init__(self, audio_path, lyrics):
+        super().__init__(daemon=True)
+        self.audio_path = audio_path
+        self.lyrics = lyrics
+        self.messages = queue.Queue()
+        self.cancel_requested = threading.Event()
+
+    def progress(self, stage, fraction):
+        if self.cancel_requested.is_set():
+            raise AnalysisCancelled()
+        self.messages.put(("progress", stage, fraction))
+
+    def cancel(self):
+        self.cancel_requested.set()
+
+    def run(self):
+        try:
+            times_ms = auto_sync(self.audio_path, self.lyrics, progress=self.progress)
+            self.messages.put(("done", times_ms))
+        except AnalysisCancelled:
+            self.messages.put(("cancelled",))
+        except Exception as e:
+            self.messages.put(("error", e))
+
+
+def draft_lrc(lyrics, times_ms):
+    """LRC text with a timestamp on every non-blank line."""
+    lines = []
+    for line, ms in zip(lyrics, times_ms):
+        lines.append(line if ms is None else f"[{format_timestamp(ms)}]{line}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Draft line timings for plain lyrics from the audio.")
+    parser.add_argument("audio", help="Audio file")
+    parser.add_argument("lyrics", help="Plain lyrics, one line per lyric line")
+    parser.add_argument("-o", "--output", help="LRC file to write (default: stdout)")
+    args = parser.parse_args(argv)
+
+    with open(args.lyrics, "r", encoding="utf-8-sig") as file:
+        lyrics = file.read().splitlines()
+    start = time.perf_counter()
+    text = draft_lrc(lyrics, auto_sync(args.audio, lyrics))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        sys.stdout.write(text)
+    print(f"Drafted {sum(1 for line in lyrics if line.strip())} lines in {time.perf_counter() - start:.2f}s",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""Headless batch processing of LRC files.
+
+Examples:
+    python lrc_batch.py offset --by=-00:01.50 ~/Lyrics --in-place
+    python lrc_batch.py quantize ~/Lyrics --grid 200 --output ~/Lyrics-synced
+    python lrc_batch.py retime ~/Lyrics --offset=-250 --scale 1.0005 --grid 100 --in-place
+    python lrc_batch.py clean ~/Lyrics --output ~/Lyrics-plain
+    python lrc_batch.py clean-stream huge-dump.lrc -o huge-dump.txt
+    cat huge-dump.lrc | python lrc_batch.py clean-stream > huge-dump.txt
+
+Only the shared LRC document model is imported here; tkinter, pygame and
+librosa stay unloaded unless an operation actually needs them.
+"""
+import argparse
+import contextlib
+import io
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+from lrc_document import LRCDocument, clean_stream
+from lrc_transforms import Offset, Quantize, Scale
+from lrc_profiling import stage
+
+OFFSET_FORMAT = re.compile(r"^([+-]?)(\d+):(\d{2})(?:\.(\d{1,3}))?$")
+
+
+def parse_offset(text):
+    """Parse +/-mm:ss.xx (or a plain number of milliseconds) into milliseconds."""
+    text = text.strip()
+    if re.match(r"^[+-]?\d+$", text):
+        return int(text)
+    match = OFFSET_FORMAT.match(text)
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid offset {text!r}, use +/-00:00.00")
+    sign, minutes, seconds, fraction = match.groups()
+    ms = int(minutes) * 60000 + int(seconds) * 1000
+    if fraction:
+        ms += int(fraction) * (1, 100, 10, 1)[len(fraction)]
+    return -ms if sign == "-" else ms
+
+
+def find_lrc_files(paths):
+    """Yield every .lrc file below the given files and directories."""
+    for path in paths:
+        if os.path.isfile(path):
+            yield os.path.dirname(os.path.abspath(path)), os.path.abspath(path)
+            continue
+        root_dir = os.path.abspath(path)
+        for dirpath, _, filenames in os.walk(root_dir):
+            for name in filenames:
+                if name.lower().endswith(".lrc"):
+                    yield root_dir, os.path.join(dirpath, name)
+
+
+def current_umask():
+    """The process umask (reading it means setting it, so it is set straight back)."""
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+@contextlib.contextmanager
+def open_atomic(path):
+    """Open a temporary file that replaces path only once the block completes without error."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".lrc-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as file:
+            yield file
+        # mkstemp creates the file as 0600; keep the permissions the target has (or would get)
+        if os.path.exists(path):
+            shutil.copymode(path, temp_path)
+        else:
+            os.chmod(temp_path, 0o666 & ~current_umask())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def write_atomic(path, text):
+    """Write text to path through a temporary file so readers never see a partial file."""
+    with open_atomic(path) as file:
+        file.write(text)
+
+
+class CountingReader(io.RawIOBase):
+    """Raw byte stream wrapper that counts the bytes read through it (for MB/s on pipes)."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.count = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.raw.read1(len(buffer)) if hasattr(self.raw, "read1") else self.raw.read(len(buffer))
+        buffer[:len(data)] = data
+        self.count += len(data)
+        return len(data)
+
+
+def apply_operation(document, operation, transforms):
+    """Run one operation on a parsed document and return the output text."""
+    if operation == "clean":
+        return document.plain_lyrics() + "\n"
+    document.transform(*transforms)
+    return document.dumps()
+
+
+def process_file(job):
+    """Worker entry point: returns (source, error message or None)."""
+    source, destination, operation, transforms = job
+    try:
+        with stage(f"batch.{operation}", path=source):
+            if operation == "clean":
+                # Cleaning never needs the whole document, so stream it line by line
+                with open(source, "r", encoding="utf-8-sig") as file, open_atomic(destination) as output:
+                    clean_stream(file, output)
+                return source, None
+            with open(source, "r", encoding="utf-8-sig") as file:
+                document = LRCDocument.parse(file.read())
+            write_atomic(destination, apply_operation(document, operation, transforms))
+        return source, None
+    except Exception as e:
+        return source, f"{type(e).__name__}: {e}"
+
+
+def build_jobs(args):
+    """Pair every input file with its output path."""
+    suffix = ".txt" if args.operation == "clean" else ".lrc"
+    for root_dir, source in find_lrc_files(args.paths):
+        if args.output:
+            relative = os.path.relpath(source, root_dir)
+            destination = os.path.join(args.output, relative)
+        else:
+            destination = source
+        if suffix != ".lrc":
+            destination = os.path.splitext(destination)[0] + suffix
+        yield source, destination, args.operation, args.transforms
+
+
+def run(args):
+    jobs = build_jobs(args)
+    processed = failed = 0
+    start = time.perf_counter()
+
+    # A mistyped path would otherwise walk nothing and pass as "0 files"
+    for path in args.paths:
+        if not os.path.exists(path):
+            processed += 1
+            failed += 1
+            print(f"FAILED {path}: No such file or directory", file=sys.stderr)
+
+    with Pool(processes=args.jobs) as pool:
+        for source, error in pool.imap_unordered(process_file, jobs, chunksize=args.chunksize):
+            processed += 1
+            if error:
+                failed += 1
+                print(f"FAILED {source}: {error}", file=sys.stderr)
+            elif args.verbose:
+                print(source)
+
+    elapsed = time.perf_counter() - start
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(
+        f"{processed} files ({failed} failed) in {elapsed:.2f}s - {rate:.1f} files/sec",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+def run_clean_stream(args):
+    """Clean one file or pipe with flat memory, reporting throughput on stderr."""
+    start = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        if args.input == "-":
+            counter = CountingReader(sys.stdin.buffer)
+            source = io.TextIOWrapper(io.BufferedReader(counter), encoding="utf-8-sig", errors="replace")
+        else:
+            counter = None
+            source = stack.enter_context(open(args.input, "r", encoding="utf-8-sig", errors="replace"))
+
+        if args.output:
+            destination = stack.enter_context(open_atomic(args.output))
+        else:
+            destination = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="", write_through=False)
+            stack.callback(destination.detach)
+            stack.callback(destination.flush)
+
+        with stage("batch.clean_stream", path=args.input):
+            lines = clean_stream(source, destination)
+
+    elapsed = time.perf_counter() - start
+    size = counter.count if counter else os.path.getsize(args.input)
+    rate = size / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+    print(f"{size / (1024 * 1024):.1f} MB, {lines} lines in {elapsed:.2f}s - {rate:.1f} MB/s", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Batch process LRC files.")
+    subparsers = parser.add_subparsers(dest="operation", required=True)
+
+    offset = subparsers.add_parser("offset", help="Shift all timestamps by a constant offset")
+    offset.add_argument("--by", dest="offset", metavar="OFFSET", type=parse_offset, required=True,
+                        help="Offset as +/-00:00.00 or milliseconds (write negative values as --by=-00:01.50)")
+
+    quantize = subparsers.add_parser("quantize", help="Snap timestamps to a fixed grid")
+    quantize.add_argument("--grid", type=int, default=200,
+                          help="Grid step in milliseconds (default: 200)")
+
+    retime = subparsers.add_parser("retime", help="Chain offset, drift scaling and quantizing in one pass")
+    retime.add_argument("--offset", type=parse_offset, help="Offset as +/-00:00.00 or milliseconds")
+    retime.add_argument("--scale", type=float, help="Drift factor applied around 00:00.00")
+    retime.add_argument("--grid", type=int, help="Grid step in milliseconds")
+
+    subparsers.add_parser("clean", help="Strip tags and write plain lyrics (.txt)")
+
+    for subparser in subparsers.choices.values():
+        subparser.add_argument("paths", nargs="+", help="LRC files or directories to walk")
+        target = subparser.add_mutually_exclusive_group(required=True)
+        target.add_argument("-o", "--output", help="Write results into this directory tree")
+        target.add_argument("--in-place", action="store_true",
+                            help="Rewrite files atomically next to the originals")
+        subparser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                               help="Worker processes (default: number of cores)")
+        subparser.add_argument("--chunksize", type=int, default=64,
+                               help="Files handed to a worker at a time")
+        subparser.add_argument("-v", "--verbose", action="store_true",
+                               help="Print every processed file")
+
+    # Single input, added after the loop so it does not get the directory options
+    clean_stream_parser = subparsers.add_parser(
+        "clean-stream", help="Strip tags from one large file or a pipe with constant memory"
+    )
+    clean_stream_parser.add_argument("input", nargs="?", default="-", help="LRC file (default: stdin)")
+    clean_stream_parser.add_argument("-o", "--output", help="Plain text file (default: stdout)")
+    return parser
+
+
+def build_transforms(args):
+    """Translate the parsed options into an ordered transform chain."""
+    transforms = []
+    if getattr(args, "offset", None):
+        transforms.append(Offset(args.offset))
+    if getattr(args, "scale", None):
+        transforms.append(Scale(args.scale))
+    if getattr(args, "grid", None):
+        transforms.append(Quantize(args.grid))
+    return transforms
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.operation == "clean-stream":
+        return run_clean_stream(args)
+    args.transforms = build_transforms(args)
+    if args.operation == "retime" and not args.transforms:
+        parser.error("retime needs at least one of --offset, --scale or --grid")
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
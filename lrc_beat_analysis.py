@@ -0,0 +1,370 @@
+import os
+
+import numpy as np
+
+from disk_cache import DiskCache, cache_key, file_fingerprint
+from lrc_profiling import stage
+
+# Bump when the analysis itself changes so stale cache entries are ignored
+ANALYSIS_VERSION = 1
+
+DEFAULT_SAMPLE_RATE = 22050  # librosa.load default
+DEFAULT_HOP_LENGTH = 512     # librosa.beat.beat_track default
+N_FFT = 2048                 # librosa.onset.onset_strength default
+
+# Tracks longer than this are analysed block by block with bounded memory
+STREAMING_MIN_SECONDS = 15 * 60
+STREAM_BLOCK_HOPS = 2048  # analysis frames per decoded block
+TEMPO_AC_SECONDS = 8.0    # librosa.feature.tempo default ac_size
+
+beat_cache = DiskCache("beats", max_bytes=256 * 1024 * 1024)
+
+# soxr quality of each librosa res_type, for the streaming resampler
+SOXR_QUALITY = {"soxr_lq": "LQ", "soxr_mq": "MQ", "soxr_hq": "HQ", "soxr_vhq": "VHQ"}
+
+# Progress stages, in order
+STAGE_DECODE = "decode"
+STAGE_ONSET = "onset"
+STAGE_BEATS = "beat track"
+
+
+class AnalysisProfile:
+    """Decode and framing settings of a beat analysis.
+
+    sr and res_type go to librosa.load, hop_length sets the time resolution
+    of the onset envelope (and so of the beats), and the FFT window keeps
+    the same duration at every sample rate. With mono=False the onset
+    envelope is the mean of the per-channel envelopes instead of that of the
+    downmix; streaming analysis always downmixes.
+    """
+
+    def __init__(self, name, sr, hop_length, res_type, mono=True):
+        self.name = name
+        self.sr = sr
+        self.hop_length = hop_length
+        self.res_type = res_type
+        self.mono = mono
+
+    @property
+    def n_fft(self):
+        return N_FFT * self.sr // DEFAULT_SAMPLE_RATE
+
+    def cache_parts(self, streaming=False):
+        # A streamed analysis is a downmixed one whatever the profile asks for
+        return self.sr, self.hop_length, self.res_type, self.mono or streaming
+
+    def __repr__(self):
+        return f"AnalysisProfile({self.name!r}, sr={self.sr}, hop_length={self.hop_length}, " \
+               f"res_type={self.res_type!r}, mono={self.mono})"
+
+
+PROFILES = {
+    # Half the samples and a low-quality resampler; same 23 ms beat resolution as balanced
+    "fast": AnalysisProfile("fast", 11025, 256, "soxr_lq"),
+    # librosa's defaults
+    "balanced": AnalysisProfile("balanced", DEFAULT_SAMPLE_RATE, DEFAULT_HOP_LENGTH, "soxr_hq"),
+    # Twice the time resolution, best resampler and per-channel onsets
+    "accurate": AnalysisProfile("accurate", DEFAULT_SAMPLE_RATE, 256, "soxr_vhq", mono=False),
+}
+INTERACTIVE_PROFILE = "fast"   # Smart Sync in the app
+BATCH_PROFILE = "accurate"     # Unattended jobs over whole albums
+DEFAULT_PROFILE = "balanced"
+
+
+def get_profile(profile):
+    """An AnalysisProfile from a profile or its name (None gives DEFAULT_PROFILE)."""
+    if isinstance(profile, AnalysisProfile):
+        return profile
+    return PROFILES[profile or DEFAULT_PROFILE]
+
+
+class AnalysisCancelled(Exception):
+    """Raised from a progress callback to abandon an analysis at the next block boundary."""
+
+
+def report(progress, stage, fraction):
+    """Call progress(stage, fraction) if a callback was given.
+
+    The callback may raise AnalysisCancelled; it is called between blocks
+    and stages, never in the middle of a librosa call.
+    """
+    if progress is not None:
+        progress(stage, fraction)
+
+
+class BeatGrid:
+    """Result of beat tracking one audio file."""
+
+    def __init__(self, beat_times, tempo, onset_envelope, sr, hop_length):
+        self.beat_times = beat_times          # seconds, float64
+        self.tempo = tempo                    # BPM
+        self.onset_envelope = onset_envelope  # one value per hop, float32
+        self.sr = sr
+        self.hop_length = hop_length
+
+
+def analysis_key(audio_path, profile, streaming=False):
+    return cache_key(file_fingerprint(audio_path), *profile.cache_parts(streaming), ANALYSIS_VERSION)
+
+
+def load_cached(key):
+    path = beat_cache.get(key, ".npz")
+    if not path:
+        return None
+    try:
+        with np.load(path) as data:
+            return BeatGrid(
+                data["beat_times"],
+                float(data["tempo"]),
+                data["onset_envelope"],
+                int(data["sr"]),
+                int(data["hop_length"]),
+            )
+    except (OSError, ValueError, KeyError):
+        return None  # Corrupt entry, analyse again
+
+
+def store_cached(key, grid):
+    temp_path = beat_cache.temp_path(".npz")
+    try:
+        np.savez(
+            temp_path,
+            beat_times=grid.beat_times,
+            tempo=grid.tempo,
+            onset_envelope=grid.onset_envelope,
+            sr=grid.sr,
+            hop_length=grid.hop_length,
+        )
+        beat_cache.commit(temp_path, key, ".npz")
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def track_beats(audio_path, profile=None, progress=None):
+    """Decode the whole file and run librosa's beat tracker on it."""
+    import librosa
+
+    profile = get_profile(profile)
+    sr, hop_length = profile.sr, profile.hop_length
+    report(progress, STAGE_DECODE, 0.0)
+    with stage("beats.decode", path=audio_path, profile=profile.name):
+        y, sr = librosa.load(audio_path, sr=sr, mono=profile.mono, res_type=profile.res_type)
+    report(progress, STAGE_ONSET, 0.0)
+    with stage("beats.onset", frames=y.shape[-1] // hop_length):
+        # Same onset envelope beat_track computes internally when given y
+        onset_envelope = librosa.onset.onset_strength(
+            y=y, sr=sr, hop_length=hop_length, n_fft=profile.n_fft, aggregate=np.median
+        )
+        if onset_envelope.ndim > 1:
+            onset_envelope = onset_envelope.mean(axis=0)
+    del y
+    return beats_from_onsets(onset_envelope, sr, hop_length, progress)
+
+
+def beats_from_onsets(onset_envelope, sr, hop_length, progress=None):
+    import librosa
+
+    report(progress, STAGE_BEATS, 0.0)
+    with stage("beats.track", frames=len(onset_envelope)):
+        tempo, beat_frames = librosa.beat.beat_track(onset_envelope=onset_envelope, sr=sr, hop_length=hop_length)
+    beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=hop_length)
+    return BeatGrid(beat_times, float(np.atleast_1d(tempo)[0]), onset_envelope.astype(np.float32), sr, hop_length)
+
+
+def can_stream(audio_path):
+    """Streaming needs a format libsndfile can read block by block (WAV, FLAC, OGG, MP3...)."""
+    try:
+        import soundfile
+        soundfile.info(audio_path)
+        return True
+    except Exception:
+        return False
+
+
+def stream_mel_blocks(audio_path, sr, hop_length, n_fft=N_FFT, res_type="soxr_hq"):
+    """Yield mel power spectrogram blocks of the file without ever holding all samples.
+
+    Mirrors librosa.load (mono downmix, res_type resampling) followed by
+    melspectrogram(center=True): the signal is zero padded by n_fft // 2 on
+    both sides and framed with the same window, so the concatenated blocks
+    equal the full-file spectrogram.
+    """
+    import librosa
+    import soundfile
+    import soxr
+
+    info = soundfile.info(audio_path)
+    resampler = None
+    if info.samplerate != sr:
+        resampler = soxr.ResampleStream(info.samplerate, sr, 1, dtype="float32", quality=SOXR_QUALITY[res_type])
+
+    mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft)
+    window = librosa.filters.get_window("hann", n_fft, fftbins=True).astype(np.float32)
+    block_samples = STREAM_BLOCK_HOPS * hop_length * info.samplerate // sr
+
+    def frames_of(buffer):
+        count = 1 + (len(buffer) - n_fft) // hop_length if len(buffer) >= n_fft else 0
+        if not count:
+            return None, buffer
+        frames = librosa.util.frame(buffer, frame_length=n_fft, hop_length=hop_length)[:, :count]
+        spectrum = np.fft.rfft(frames * window[:, None], axis=0).astype(np.complex64)
+        power = np.abs(spectrum) ** 2
+        return mel_basis @ power, buffer[count * hop_length:]
+
+    buffer = np.zeros(n_fft // 2, dtype=np.float32)
+    for block in soundfile.blocks(audio_path, blocksize=block_samples, dtype="float32", always_2d=True):
+        mono = block.mean(axis=1, dtype=np.float32)
+        if resampler is not None:
+            mono = resampler.resample_chunk(mono)
+        mel, buffer = frames_of(np.concatenate([buffer, mono]))
+        if mel is not None:
+            yield mel
+
+    tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True) if resampler else buffer[:0]
+    mel, _ = frames_of(np.concatenate([buffer, tail, np.zeros(n_fft // 2, dtype=np.float32)]))
+    if mel is not None:
+        yield mel
+
+
+def streaming_onset_envelope(audio_path, sr, hop_length, n_fft=N_FFT, progress=None, res_type="soxr_hq"):
+    """onset_strength(aggregate=median) computed block by block in two passes.
+
+    power_to_db clips at 80 dB below the loudest bin of the whole track, so
+    the first pass only finds that maximum; the second pass builds the
+    envelope with the same floor. Memory is bounded by one block plus the
+    envelope itself (one float per hop).
+    """
+    import soundfile
+
+    amin, top_db = 1e-10, 80.0
+    expected_frames = max(1, int(soundfile.info(audio_path).duration * sr / hop_length))
+
+    report(progress, STAGE_DECODE, 0.0)
+    peak = amin
+    frames = 0
+    with stage("beats.stream_peak_pass", path=audio_path):
+        for mel in stream_mel_blocks(audio_path, sr, hop_length, n_fft, res_type):
+            peak = max(peak, float(mel.max()))
+            frames += mel.shape[1]
+            report(progress, STAGE_DECODE, min(frames / expected_frames, 1.0))
+    floor = 10.0 * np.log10(peak) - top_db
+
+    report(progress, STAGE_ONSET, 0.0)
+    envelope = []
+    previous = None
+    frames = 0
+    with stage("beats.stream_onset_pass", path=audio_path):
+        for mel in stream_mel_blocks(audio_path, sr, hop_length, n_fft, res_type):
+            frames += mel.shape[1]
+            report(progress, STAGE_ONSET, min(frames / expected_frames, 1.0))
+            db = np.maximum(10.0 * np.log10(np.maximum(amin, mel)), floor)
+            if previous is not None:
+                db = np.concatenate([previous, db], axis=1)
+            envelope.append(np.median(np.maximum(0.0, db[:, 1:] - db[:, :-1]), axis=0))
+            previous = db[:, -1:]
+
+    # Same lag/centering compensation as librosa, trimmed to the frame count
+    onsets = np.concatenate(envelope) if envelope else np.zeros(0, dtype=np.float32)
+    total_frames = len(onsets) + 1
+    pad_width = 1 + n_fft // (2 * hop_length)
+    return np.concatenate([np.zeros(pad_width, dtype=onsets.dtype), onsets])[:total_frames]
+
+
+def streaming_tempo(onset_envelope, sr, hop_length):
+    """librosa.feature.tempo without materialising the full tempogram.
+
+    The tempo estimate only needs the mean autocorrelation over all frames,
+    so the tempogram is built and summed a block of frames at a time.
+    """
+    import librosa
+
+    win_length = librosa.time_to_frames(TEMPO_AC_SECONDS, sr=sr, hop_length=hop_length).item()
+    window = librosa.filters.get_window("hann", win_length, fftbins=True)[:, None]
+    padded = np.pad(onset_envelope, win_length // 2, mode="linear_ramp", end_values=[0, 0])
+    frames = librosa.util.frame(padded, frame_length=win_length, hop_length=1)
+
+    total = np.zeros(win_length)
+    count = len(onset_envelope)
+    for start in range(0, count, STREAM_BLOCK_HOPS):
+        block = frames[:, start:min(start + STREAM_BLOCK_HOPS, count)]
+        autocorrelation = librosa.autocorrelate(block * window, axis=0)
+        total += librosa.util.normalize(autocorrelation, norm=np.inf, axis=0).sum(axis=1)
+
+    return librosa.feature.tempo(tg=(total / count)[:, None], sr=sr, hop_length=hop_length)
+
+
+def track_beats_streaming(audio_path, profile=None, progress=None):
+    """Beat tracking with memory that stays flat regardless of track length."""
+    import librosa
+
+    profile = get_profile(profile)
+    sr, hop_length = profile.sr, profile.hop_length
+    onset_envelope = streaming_onset_envelope(
+        audio_path, sr, hop_length, profile.n_fft, progress=progress, res_type=profile.res_type
+    )
+    report(progress, STAGE_BEATS, 0.0)
+    with stage("beats.tempo", frames=len(onset_envelope)):
+        tempo = streaming_tempo(onset_envelope, sr, hop_length) if onset_envelope.any() else None
+    with stage("beats.track", frames=len(onset_envelope)):
+        tempo, beat_frames = librosa.beat.beat_track(
+            onset_envelope=onset_envelope, sr=sr, hop_length=hop_length, bpm=tempo
+        )
+    beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=hop_length)
+    return BeatGrid(beat_times, float(np.atleast_1d(tempo)[0]), onset_envelope.astype(np.float32), sr, hop_length)
+
+
+def should_stream(audio_path):
+    if not can_stream(audio_path):
+        return False
+    import soundfile
+    return soundfile.info(audio_path).duration >= STREAMING_MIN_SECONDS
+
+
+def should_stream_interactive(audio_path, profile=None):
+    """Whether a cancellable analysis should go block by block whatever the track length.
+
+    A full load can only be abandoned between stages, so an interactive run
+    streams every track it can when that gives the same beats: always for
+    downmixing profiles, never for a mono=False one (whose streamed result
+    differs), which keeps the full load below STREAMING_MIN_SECONDS.
+    """
+    if get_profile(profile).mono and can_stream(audio_path):
+        return True
+    return should_stream(audio_path)
+
+
+def analyze_beats(audio_path, profile=None, use_cache=True, streaming=None, progress=None):
+    """Beat grid for an audio file, served from the on-disk cache when possible.
+
+    profile is an AnalysisProfile or a name from PROFILES (default
+    DEFAULT_PROFILE); each profile is cached separately.
+    streaming=None picks the block-wise analysis automatically for long
+    tracks, or whenever should_stream_interactive allows it once a progress
+    callback is given; True/False forces either mode. For downmixing profiles both give
+    the same beat times. Streaming always downmixes, so a mono=False profile
+    gives different results when streamed, and those are cached under their
+    own key.
+    progress(stage, fraction) is called as the analysis advances; raising
+    AnalysisCancelled from it stops the analysis (per block when streaming,
+    otherwise between stages).
+    """
+    profile = get_profile(profile)
+    if streaming is None:
+        streaming = should_stream_interactive(audio_path, profile) if progress else should_stream(audio_path)
+    if use_cache:
+        with stage("beats.cache_lookup"):
+            key = analysis_key(audio_path, profile, streaming)
+            grid = load_cached(key)
+        if grid is not None:
+            return grid
+
+    if streaming:
+        grid = track_beats_streaming(audio_path, profile, progress)
+    else:
+        grid = track_beats(audio_path, profile, progress)
+    report(progress, STAGE_BEATS, 1.0)
+
+    if use_cache:
+        store_cached(key, grid)
+    return grid
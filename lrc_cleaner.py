@@ -1,6 +1,11 @@
-import re
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, filedialog, messagebox, scrolledtext
+import os
+import queue
+import threading
+import time
+from lrc_document import LRCDocument, clean_stream
+from lrc_profiling import stage
 
 class LRCCleaner:
     def __init__(self, root, setup_menu_callback):
@@ -31,6 +36,11 @@ class LRCCleaner:
         # Process button
         ttk.Button(self.root, text="Remove LRC Format", command=self.process_lrc).pack(pady=5)
 
+        # Large files are cleaned file to file without going through the text boxes
+        ttk.Button(self.root, text="Clean LRC File to Text File...", command=self.clean_file).pack(pady=5)
+        self.file_status = ttk.Label(self.root, text="")
+        self.file_status.pack(pady=2)
+
         # Output text box
         ttk.Label(self.root, text="Plain Lyrics:").pack(pady=5)
         self.output_text = scrolledtext.ScrolledText(
@@ -60,28 +70,66 @@ class LRCCleaner:
             return
 
         # Process the LRC text
-        plain_lyrics = self.remove_lrc_format(lrc_text)
+        with stage("cleaner.clean", chars=len(lrc_text)):
+            plain_lyrics = self.remove_lrc_format(lrc_text)
 
         # Display the output
-        self.output_text.config(state="normal")
-        self.output_text.delete("1.0", tk.END)
-        self.output_text.insert("1.0", plain_lyrics)
-        self.output_text.config(state="disabled")
+        with stage("cleaner.render"):
+            self.output_text.config(state="normal")
+            self.output_text.delete("1.0", tk.END)
+            self.output_text.insert("1.0", plain_lyrics)
+            self.output_text.config(state="disabled")
+
+    def clean_file(self):
+        """Stream an LRC file of any size into a plain text file on a worker thread."""
+        source = filedialog.askopenfilename(filetypes=[("LRC Files", "*.lrc"), ("All Files", "*.*")])
+        if not source:
+            return
+        destination = filedialog.asksaveasfilename(
+            defaultextension=".txt", initialfile=os.path.splitext(os.path.basename(source))[0] + ".txt",
+            filetypes=[("Text Files", "*.txt")],
+        )
+        if not destination:
+            return
+
+        results = queue.Queue()
+
+        def work():
+            start = time.perf_counter()
+            try:
+                with stage("cleaner.clean_file", path=source):
+                    with open(source, "r", encoding="utf-8-sig", errors="replace") as file, \
+                            open(destination, "w", encoding="utf-8", newline="") as output:
+                        clean_stream(file, output)
+                elapsed = time.perf_counter() - start
+                results.put((os.path.getsize(source), elapsed, None))
+            except Exception as e:
+                results.put((0, 0.0, e))
+
+        threading.Thread(target=work, daemon=True).start()
+        self.file_status.config(text=f"Cleaning {os.path.basename(source)}...")
+        self.root.after(100, self.poll_clean_file, results, destination)
+
+    def poll_clean_file(self, results, destination):
+        if not self.file_status.winfo_exists():
+            return
+        try:
+            size, elapsed, error = results.get_nowait()
+        except queue.Empty:
+            self.root.after(100, self.poll_clean_file, results, destination)
+            return
+        if error:
+            self.file_status.config(text="")
+            messagebox.showerror("Error", f"Failed to clean file: {error}")
+            return
+        megabytes = size / (1024 * 1024)
+        rate = megabytes / elapsed if elapsed > 0 else 0.0
+        self.file_status.config(text=f"Saved {os.path.basename(destination)}: {megabytes:.1f} MB at {rate:.1f} MB/s")
 
     @staticmethod
     def remove_lrc_format(lrc_text):
         """Removes LRC tags and timestamps while preserving line breaks."""
-        lines = lrc_text.splitlines()
-        cleaned_lines = []
-        for line in lines:
-            # Remove LRC metadata tags (e.g., [ti:...], [ar:...], [al:...])
-            if re.match(r"^\[.*?:.*?\]$", line.strip()):
-                continue
-            # Remove timestamp tags (e.g., [00:11.65])
-            cleaned_line = re.sub(r"\[.*?\]", "", line).strip()
-            # Add the line if it's not empty, preserving blank lines
-            cleaned_lines.append(cleaned_line if cleaned_line else "")
-        return "\n".join(cleaned_lines)
+        return LRCDocument.parse(lrc_text).plain_lyrics()
 
     def add_context_menu_and_shortcuts(self, text_widget):
         """Add a right-click menu and Ctrl+A shortcut for a text widget."""
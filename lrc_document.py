@@ -0,0 +1,307 @@
+import re
+from array import array
+
+# Leading line timestamp, e.g. [00:11.65], [0:11], [00:11.650] or [00:11:65]
+TIME_TAG = re.compile(r"\[(\d+):(\d{1,2})(?:[.:](\d{1,3}))?\]")
+# All leading timestamps of a line at once
+LEADING_TIME_TAGS = re.compile(r"(?:\[\d+:\d{1,2}(?:[.:]\d{1,3})?\])+")
+# Whole-line metadata tag, e.g. [ti:Title], [ar:Artist], [offset:+250]
+META_TAG = re.compile(r"\[([^\]\d:][^\]:]*):([^\]]*)\]\s*$")
+# Any bracketed tag left inside the lyric text
+ANY_TAG = re.compile(r"\[.*?\]")
+# Enhanced LRC word timestamp inside the lyric text, e.g. <00:11.65>
+WORD_TAG = re.compile(r"<(\d+):(\d{1,2})(?:[.:](\d{1,3}))?>")
+# A word for the generator's word tapping: any run of non-space characters
+WORD = re.compile(r"\S+")
+
+LINE_TEXT = 0   # Plain line, no tags
+LINE_TIMED = 1  # One or more leading timestamps
+LINE_META = 2   # Metadata tag line
+
+
+def parse_timestamp(minutes, seconds, fraction):
+    """Convert the groups of a TIME_TAG match to integer milliseconds."""
+    ms = int(minutes) * 60000 + int(seconds) * 1000
+    if fraction:
+        # .6 -> 600ms, .65 -> 650ms, .650 -> 650ms
+        ms += int(fraction) * (1, 100, 10, 1)[len(fraction)]
+    return ms
+
+
+def format_timestamp(ms, precision=2):
+    """Format milliseconds as mm:ss.xx (or mm:ss.xxx) using integer math only."""
+    ms = max(int(ms), 0)
+    if precision == 3:
+        minutes, rest = divmod(ms, 60000)
+        return f"{minutes:02}:{rest // 1000:02}.{rest % 1000:03}"
+    # Round to the nearest centisecond and carry into seconds/minutes
+    minutes, rest = divmod((ms + 5) // 10, 6000)
+    return f"{minutes:02}:{rest // 100:02}.{rest % 100:02}"
+
+
+def timestamp_precision(ms):
+    """Use centiseconds unless the value needs millisecond precision."""
+    return 2 if ms % 10 == 0 else 3
+
+
+def word_spans(text):
+    """(start, end) character offsets of the words in a lyric line."""
+    return [match.span() for match in WORD.finditer(text)]
+
+
+def tag_words(text, word_times_ms):
+    """Insert <mm:ss.xx> tags before the first len(word_times_ms) words of text."""
+    pieces = []
+    last = 0
+    for (start, _), ms in zip(word_spans(text), word_times_ms):
+        pieces.append(text[last:start])
+        pieces.append(f"<{format_timestamp(ms, timestamp_precision(ms))}>")
+        last = start
+    pieces.append(text[last:])
+    return "".join(pieces)
+
+
+def lrc_base_name(audio_path):
+    """Return the audio file's name without extension (or the _converted.wav suffix)."""
+    base_name = audio_path.replace("\\", "/").split("/")[-1]
+    if base_name.endswith("_converted.wav"):
+        return base_name[:-len("_converted.wav")]
+    return base_name.rsplit(".", 1)[0]
+
+
+def plain_text(kind, text):
+    """Plain lyric for one classified line, or None when the line is dropped.
+
+    Metadata lines and lines that only hold timestamps are dropped; any tag
+    left inside the text is removed.
+    """
+    if kind == LINE_META or (kind == LINE_TIMED and not text.strip()):
+        return None
+    if "<" in text:
+        text = WORD_TAG.sub("", text)
+    return ANY_TAG.sub("", text).strip()
+
+
+def clean_line(line):
+    """Plain lyric for one raw LRC line, or None when the line is dropped.
+
+    Same result as plain_text() on the parsed line, without building times.
+    """
+    match = LEADING_TIME_TAGS.match(line)
+    if match:
+        text = line[match.end():]
+        if "<" in text:
+            text = WORD_TAG.sub("", text)
+        if not text.strip():
+            return None
+    elif line.startswith("[") and META_TAG.match(line):
+        return None
+    else:
+        text = line
+        if "<" in text:
+            text = WORD_TAG.sub("", text)
+    if "[" in text:
+        text = ANY_TAG.sub("", text)
+    return text.strip()
+
+
+def clean_stream(source, destination, batch_lines=4096):
+    """Write the plain lyrics of text stream source to text stream destination.
+
+    Lines are read, cleaned and written incrementally (in batches of
+    batch_lines), so memory stays flat however large the input is. The
+    output matches plain_lyrics() with a newline after every line. Returns
+    the number of lines written.
+    """
+    written = 0
+    batch = []
+    for line in source:
+        cleaned = clean_line(line.rstrip("\r\n"))
+        if cleaned is None:
+            continue
+        batch.append(cleaned + "\n")
+        if len(batch) >= batch_lines:
+            destination.writelines(batch)
+            written += len(batch)
+            batch = []
+    destination.writelines(batch)
+    return written + len(batch)
+
+
+class LRCDocument:
+    """Parsed LRC text.
+
+    Every line keeps its kind and its text. Line timestamps of all lines are
+    stored in one flat integer-millisecond array; line ``i`` owns the slice
+    ``times[starts[i]:starts[i + 1]]``, so multi-timestamp lines such as
+    ``[00:10.00][00:42.00]chorus`` keep all of their times.
+
+    Enhanced LRC word tags (``[00:10.00]<00:10.00>first <00:10.40>word``)
+    are removed from the stored text. Their times go into a second flat
+    array, ``word_times``, with the character offset each tag had in the
+    stored text in ``word_positions``; line ``i`` owns the slice
+    ``word_starts[i]:word_starts[i + 1]`` of both.
+    """
+
+    def __init__(self):
+        self.kinds = bytearray()
+        self.texts = []
+        self.times = array("i")
+        self.starts = array("i", [0])
+        self.word_times = array("i")
+        self.word_positions = array("i")
+        self.word_starts = array("i", [0])
+        self.trailing_newline = False
+
+    @classmethod
+    def parse(cls, lrc_text):
+        """Parse LRC text in a single pass over its lines."""
+        if isinstance(lrc_text, (list, tuple)):
+            lrc_text = "".join(lrc_text)
+        doc = cls()
+        doc.trailing_newline = lrc_text.endswith(("\n", "\r"))
+        for line in lrc_text.splitlines():
+            doc.append_line(line)
+        return doc
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as file:
+            return cls.parse(file.read())
+
+    def append_line(self, line):
+        """Tokenize one line and append it to the document."""
+        times = self.times
+        pos = 0
+        match = TIME_TAG.match(line)
+        while match:
+            times.append(parse_timestamp(*match.groups()))
+            pos = match.end()
+            match = TIME_TAG.match(line, pos)
+
+        if pos:
+            text = line[pos:]
+            self.kinds.append(LINE_TIMED)
+            self.texts.append(self._take_word_tags(text) if "<" in text else text)
+        elif line.startswith("[") and META_TAG.match(line):
+            self.kinds.append(LINE_META)
+            self.texts.append(line)
+        else:
+            self.kinds.append(LINE_TEXT)
+            self.texts.append(line)
+        self.starts.append(len(times))
+        self.word_starts.append(len(self.word_times))
+
+    def _take_word_tags(self, text):
+        """Record the word tags of a timed line's text and return the text without them."""
+        parts = WORD_TAG.split(text)
+        if len(parts) == 1:
+            return text
+        # parts alternates text pieces with the (minutes, seconds, fraction) groups of each tag
+        pieces = parts[0::4]
+        word_times, word_positions = self.word_times, self.word_positions
+        length = 0
+        for i in range(1, len(parts), 4):
+            length += len(parts[i - 1])
+            word_times.append(parse_timestamp(parts[i], parts[i + 1], parts[i + 2]))
+            word_positions.append(length)
+        return "".join(pieces)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def line_times(self, index):
+        """Timestamps (ms) of one line."""
+        return self.times[self.starts[index]:self.starts[index + 1]]
+
+    def word_times_of(self, index):
+        """Word timestamps (ms) of one line; empty unless it is an enhanced line."""
+        return self.word_times[self.word_starts[index]:self.word_starts[index + 1]]
+
+    def word_line_anchors(self):
+        """For every entry of ``word_times``, the index in ``times`` of its line's first timestamp."""
+        anchors = array("i")
+        word_starts, starts = self.word_starts, self.starts
+        for index in range(len(self.texts)):
+            count = word_starts[index + 1] - word_starts[index]
+            if count:
+                anchors.extend([starts[index]] * count)
+        return anchors
+
+    def timed_lines(self):
+        """Yield (index, text) for every line carrying at least one timestamp."""
+        for index, kind in enumerate(self.kinds):
+            if kind == LINE_TIMED:
+                yield index, self.texts[index]
+
+    def line_index_of_times(self):
+        """Return an array mapping each entry of ``times`` to its line index."""
+        owners = array("i")
+        starts = self.starts
+        for index in range(len(self.texts)):
+            owners.extend([index] * (starts[index + 1] - starts[index]))
+        return owners
+
+    @property
+    def metadata(self):
+        """Metadata tags as a dict, e.g. {"ti": "Title", "ar": "Artist"}."""
+        tags = {}
+        for index, kind in enumerate(self.kinds):
+            if kind == LINE_META:
+                key, value = META_TAG.match(self.texts[index]).groups()
+                tags[key.strip()] = value.strip()
+        return tags
+
+    def format_line(self, index):
+        """Serialize one line back to LRC."""
+        if self.kinds[index] != LINE_TIMED:
+            return self.texts[index]
+        tags = "".join(
+            f"[{format_timestamp(ms, timestamp_precision(ms))}]" for ms in self.line_times(index)
+        )
+        text = self.texts[index]
+        first, last = self.word_starts[index], self.word_starts[index + 1]
+        if first == last:
+            return tags + text
+        pieces = [tags]
+        previous = 0
+        for position, ms in zip(self.word_positions[first:last], self.word_times[first:last]):
+            pieces.append(text[previous:position])
+            pieces.append(f"<{format_timestamp(ms, timestamp_precision(ms))}>")
+            previous = position
+        pieces.append(text[previous:])
+        return "".join(pieces)
+
+    def dumps(self):
+        """Serialize the whole document back to LRC text."""
+        text = "\n".join(self.format_line(index) for index in range(len(self.texts)))
+        return text + "\n" if self.trailing_newline else text
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(self.dumps())
+
+    def transform(self, *transforms):
+        """Apply lrc_transforms steps (Offset, Quantize, ...) to every timestamp in one pass.
+
+        Word timestamps go through the same steps when every step maps each
+        time independently. Steps that look at the sequence as a whole
+        (BeatAlign) only see line times; words then move by the same amount
+        as the first timestamp of their line.
+        """
+        from lrc_transforms import apply_transforms, follow_anchors, is_pointwise
+
+        if not len(self.word_times):
+            apply_transforms(self.times, *transforms)
+        elif all(is_pointwise(transform) for transform in transforms):
+            apply_transforms(self.times, *transforms)
+            apply_transforms(self.word_times, *transforms)
+        else:
+            before = array("i", self.times)
+            apply_transforms(self.times, *transforms)
+            follow_anchors(self.word_times, self.word_line_anchors(), before, self.times)
+
+    def plain_lyrics(self):
+        """Lyrics without metadata lines or tags, preserving line breaks."""
+        cleaned_lines = (plain_text(kind, text) for kind, text in zip(self.kinds, self.texts))
+        return "\n".join(line for line in cleaned_lines if line is not None)
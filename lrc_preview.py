@@ -0,0 +1,73 @@
+import tkinter as tk
+
+HIGHLIGHT_TAG = "highlight"
+WORD_TAG = "word"
+WORD_BACKGROUND = "#FFE082"
+LOOKAHEAD_LINES = 5  # Lines kept visible below the current one
+
+
+class LyricsPreview:
+    """Keeps the preview Text widget in step with the lyric lines.
+
+    After the initial render only the changed line is rewritten, and the
+    highlight is moved by removing it from the one line that carries it, so
+    the cost of a tap does not depend on the length of the lyrics.
+    """
+
+    def __init__(self, preview_text, lyrics_text):
+        self.preview_text = preview_text
+        self.lyrics_text = lyrics_text
+        self.line_count = 0
+        self.highlighted = None
+        self.highlighted_word = None
+        for widget in (preview_text, lyrics_text):
+            widget.tag_configure(HIGHLIGHT_TAG, underline=True)
+        lyrics_text.tag_configure(WORD_TAG, background=WORD_BACKGROUND)
+
+    def render(self, lines):
+        """Full redraw; only needed when the whole set of lines changes."""
+        self.highlight(None)
+        self.highlight_word(None)
+        self.preview_text.config(state="normal")
+        self.preview_text.delete(1.0, tk.END)
+        self.preview_text.insert(tk.END, "\n".join(lines))
+        self.preview_text.config(state="disabled")
+        self.line_count = len(lines)
+
+    def update_line(self, index, text):
+        """Replace the text of a single line (0-based)."""
+        line = index + 1
+        self.preview_text.config(state="normal")
+        self.preview_text.delete(f"{line}.0", f"{line}.end")
+        self.preview_text.insert(f"{line}.0", text)
+        self.preview_text.config(state="disabled")
+        if self.highlighted == index:
+            self.preview_text.tag_add(HIGHLIGHT_TAG, f"{line}.0", f"{line}.end")
+
+    def highlight(self, index):
+        """Move the highlight to line index (0-based) in both widgets; None clears it."""
+        for widget in (self.lyrics_text, self.preview_text):
+            if self.highlighted is not None:
+                line = self.highlighted + 1
+                widget.tag_remove(HIGHLIGHT_TAG, f"{line}.0", f"{line}.end")
+            if index is not None and index < self.line_count:
+                line = index + 1
+                widget.tag_add(HIGHLIGHT_TAG, f"{line}.0", f"{line}.end")
+        self.highlighted = index if index is not None and index < self.line_count else None
+
+    def highlight_word(self, index, span=None):
+        """Mark characters span = (start, end) of line index in the lyrics widget; None clears it."""
+        if self.highlighted_word is not None:
+            self.lyrics_text.tag_remove(WORD_TAG, *self.highlighted_word)
+            self.highlighted_word = None
+        if index is not None and span is not None:
+            line = index + 1
+            self.highlighted_word = (f"{line}.{span[0]}", f"{line}.{span[1]}")
+            self.lyrics_text.tag_add(WORD_TAG, *self.highlighted_word)
+
+    def scroll_to(self, index):
+        """Show line index together with the lines that follow it."""
+        last = min(index + LOOKAHEAD_LINES, max(self.line_count - 1, 0)) + 1
+        for widget in (self.lyrics_text, self.preview_text):
+            widget.see(f"{last}.0")
+            widget.see(f"{index + 1}.0")
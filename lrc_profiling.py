@@ -0,0 +1,167 @@
+"""Per-stage timing and profiling for the LRC tools.
+
+Instrumented code wraps each stage in ``with stage("name"):``. Everything
+is off unless enabled through the environment before the app starts:
+
+    LRC_TRACE=path       append one JSON line per stage to path ("1" uses
+                         trace.jsonl in the app data directory): wall time,
+                         CPU time of the calling thread and the process's
+                         peak resident memory
+    LRC_TRACE_MEMORY=1   also record each stage's own peak allocation with
+                         tracemalloc (exact, but slows allocation-heavy code
+                         such as first-time numba compilation)
+    LRC_PROFILE=dir      write a cProfile dump of every outermost stage to
+                         dir, for snakeviz/pstats
+
+When all are unset stage() returns one shared no-op context manager, so
+an instrumented call costs a function call and an attribute check.
+"""
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+TRACE_ENV = "LRC_TRACE"
+MEMORY_ENV = "LRC_TRACE_MEMORY"
+PROFILE_ENV = "LRC_PROFILE"
+DEFAULT_TRACE_NAME = "trace.jsonl"
+
+_NO_STAGE = contextlib.nullcontext()
+
+
+def _flag(name):
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+def _trace_path():
+    value = os.environ.get(TRACE_ENV, "")
+    if value.lower() in ("", "0", "false", "no"):
+        return None
+    if _flag(TRACE_ENV):
+        from disk_cache import app_data_dir
+        return os.path.join(app_data_dir(), DEFAULT_TRACE_NAME)
+    return value
+
+
+TRACE_PATH = _trace_path()
+TRACE_MEMORY = bool(TRACE_PATH) and _flag(MEMORY_ENV)
+PROFILE_DIR = os.environ.get(PROFILE_ENV) or None
+ENABLED = bool(TRACE_PATH or PROFILE_DIR)
+
+_write_lock = threading.Lock()
+_local = threading.local()
+_profile_count = 0
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def peak_rss_kb():
+    """High-water mark of the process's resident memory in KiB, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset // 1024  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _write(record):
+    line = json.dumps(record, default=str) + "\n"
+    with _write_lock:
+        # Opened per record in append mode so batch worker processes can share the file
+        with open(TRACE_PATH, "a", encoding="utf-8") as file:
+            file.write(line)
+
+
+class Stage:
+    """One timed stage; use stage() rather than creating these directly."""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.profiler = None
+        self.carried_peak = 0  # Peaks of nested stages, which reset the tracemalloc peak
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1] if stack else None
+        stack.append(self)
+
+        if TRACE_PATH:
+            self.start_rss = peak_rss_kb()
+        if TRACE_MEMORY:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.start_memory, self.outer_peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+
+        if PROFILE_DIR and self.parent is None:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError:
+                self.profiler = None  # Another profiler is active (other thread on 3.12+)
+
+        self.start_cpu = time.thread_time()
+        self.start_wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        global _profile_count
+
+        wall = time.perf_counter() - self.start_wall
+        cpu = time.thread_time() - self.start_cpu
+        _stack().pop()
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            with _write_lock:
+                _profile_count += 1
+                number = _profile_count
+            safe_name = "".join(c if c.isalnum() or c in "._-" else "_" for c in self.name)
+            self.profiler.dump_stats(os.path.join(PROFILE_DIR, f"{safe_name}-{os.getpid()}-{number}.prof"))
+
+        if TRACE_PATH:
+            rss = peak_rss_kb()
+            record = {
+                "stage": self.name,
+                "wall_ms": round(wall * 1000, 3),
+                "cpu_ms": round(cpu * 1000, 3),
+                "peak_rss_kb": rss,
+                "peak_rss_growth_kb": rss - self.start_rss if rss is not None else None,
+                "parent": self.parent.name if self.parent else None,
+                "ok": exc_type is None,
+                "time": time.time(),
+                "pid": os.getpid(),
+                "thread": threading.current_thread().name,
+            }
+            if TRACE_MEMORY:
+                import tracemalloc
+                peak = max(tracemalloc.get_traced_memory()[1], self.carried_peak)
+                if self.parent is not None:
+                    self.parent.carried_peak = max(self.parent.carried_peak, self.outer_peak, peak)
+                record["peak_alloc_kb"] = max(peak - self.start_memory, 0) // 1024
+            record.update(self.fields)
+            _write(record)
+        return False
+
+
+def stage(name, **fields):
+    """Context manager that records one named stage; extra fields go into its trace line."""
+    if not ENABLED:
+        return _NO_STAGE
+    return Stage(name, fields)
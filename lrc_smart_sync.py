@@ -1,6 +1,75 @@
-import librosa
-from tkinter import filedialog, messagebox, Tk, Text, Button
+from tkinter import filedialog, messagebox, ttk, Tk, Text, Button
 import tkinter as tk
+import queue
+import threading
+from lrc_document import LRCDocument
+from lrc_beat_analysis import (
+    INTERACTIVE_PROFILE, PROFILES, AnalysisCancelled, STAGE_BEATS, STAGE_DECODE, STAGE_ONSET, analyze_beats,
+    should_stream_interactive,
+)
+from lrc_transforms import BandedBeatAlign
+from lrc_profiling import stage
+
+STAGE_ALIGN = "align"
+# Share of the progress bar each stage fills, in order
+STAGE_SPANS = {
+    STAGE_DECODE: (0.0, 0.4),
+    STAGE_ONSET: (0.4, 0.75),
+    STAGE_BEATS: (0.75, 0.95),
+    STAGE_ALIGN: (0.95, 1.0),
+}
+POLL_INTERVAL_MS = 50
+
+
+class SyncWorker(threading.Thread):
+    """Runs beat analysis and alignment off the Tk thread.
+
+    Everything the UI needs is posted to self.messages as tuples:
+    ("progress", stage, fraction), ("done", lrc_text), ("cancelled",) or
+    ("error", exception). Tk widgets are never touched from this thread.
+    """
+
+    def __init__(self, audio_path, lyrics, profile=INTERACTIVE_PROFILE):
+        super().__init__(daemon=True)
+        self.audio_path = audio_path
+        self.lyrics = lyrics
+        self.profile = profile
+        self.messages = queue.Queue()
+        self.cancel_requested = threading.Event()
+        # Streamed analyses stop within a block; a full load only between stages
+        self.streaming = None
+
+    def progress(self, stage, fraction):
+        if self.cancel_requested.is_set():
+            raise AnalysisCancelled()
+        self.messages.put(("progress", stage, fraction))
+
+    def cancel(self):
+        self.cancel_requested.set()
+
+    def run(self):
+        try:
+            with stage("smart_sync.total", path=self.audio_path, profile=self.profile):
+                # Detect beats (cached on disk per audio content, so re-syncs skip the analysis)
+                with stage("smart_sync.analyze"):
+                    self.streaming = should_stream_interactive(self.audio_path, self.profile)
+                    beat_times = analyze_beats(
+                        self.audio_path, self.profile, streaming=self.streaming, progress=self.progress
+                    ).beat_times
+
+                # Map every timestamp (including each tag of multi-timestamp lines) onto the beat
+                # grid at once, with the least total movement
+                self.progress(STAGE_ALIGN, 0.0)
+                with stage("smart_sync.align", lines=len(self.lyrics), beats=len(beat_times)):
+                    document = LRCDocument.parse(self.lyrics)
+                    document.transform(BandedBeatAlign(beat_times * 1000, min_gap_ms=500))
+                    lrc_text = document.dumps()
+                self.progress(STAGE_ALIGN, 1.0)
+            self.messages.put(("done", lrc_text))
+        except AnalysisCancelled:
+            self.messages.put(("cancelled",))
+        except Exception as e:
+            self.messages.put(("error", e))
 
 
 class LRCSmartSync:
@@ -9,6 +78,7 @@ class LRCSmartSync:
         self.setup_menu_callback = setup_menu_callback
         self.audio_path = ""
         self.lyrics = []
+        self.worker = None
         self.setup_ui()
 
     def setup_ui(self):
@@ -27,7 +97,26 @@ class LRCSmartSync:
         Button(self.root, text="Load LRC File", command=self.load_lrc).pack(pady=10)
         self.lrc_text = Text(self.root, width=80, height=20)
         self.lrc_text.pack(pady=10)
-        Button(self.root, text="Sync Timings", command=self.sync_timings).pack(pady=10)
+        # Analysis profile: fast for quick previews, accurate for the final timing
+        profile_frame = tk.Frame(self.root)
+        profile_frame.pack(pady=5)
+        tk.Label(profile_frame, text="Analysis:").pack(side=tk.LEFT, padx=5)
+        self.profile = tk.StringVar(value=INTERACTIVE_PROFILE)
+        ttk.Combobox(
+            profile_frame, textvariable=self.profile, values=list(PROFILES), state="readonly", width=10
+        ).pack(side=tk.LEFT)
+        self.sync_button = Button(self.root, text="Sync Timings", command=self.sync_timings)
+        self.sync_button.pack(pady=10)
+
+        # Analysis progress
+        progress_frame = tk.Frame(self.root)
+        progress_frame.pack(pady=5)
+        self.progress_bar = ttk.Progressbar(progress_frame, length=400, maximum=1.0)
+        self.progress_bar.pack(side=tk.LEFT, padx=5)
+        self.cancel_button = Button(progress_frame, text="Cancel", command=self.cancel_sync, state="disabled")
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+        self.status_label = tk.Label(self.root, text="")
+        self.status_label.pack()
         Button(self.root, text="Save LRC File", command=self.save_lrc).pack(pady=10)
 
     def load_audio(self):
@@ -55,86 +144,72 @@ class LRCSmartSync:
         if not self.audio_path or not self.lyrics:
             messagebox.showerror("Error", "Load both audio and LRC files first.")
             return
-    
-        try:
-            # Load audio and detect beats
-            y, sr = librosa.load(self.audio_path)
-            _, beat_frames = librosa.beat.beat_track(y=y, sr=sr)
-            beat_times = librosa.frames_to_time(beat_frames, sr=sr)
-    
-            synced_lyrics = []
-            current_beat_index = 0
-            adjusted_timings = []
-    
-            # Extract and process original timings
-            original_timings = []
-            lyrics_text = []
-            line_mapping = []  # Keeps track of which lines contain timestamps
-    
-            for line in self.lyrics:
-                if line.startswith("[") and "]" in line:
-                    try:
-                        # Extract timestamp and lyrics
-                        timestamp, text = line.split("]", 1)
-                        minutes, seconds = map(float, timestamp[1:].split(":"))
-                        original_time = minutes * 60 + seconds
-                        original_timings.append(original_time)
-                        lyrics_text.append(text.strip())
-                        line_mapping.append(True)  # Line has a timestamp
-                    except Exception:
-                        synced_lyrics.append(line)  # Keep non-timestamp lines as-is
-                        line_mapping.append(False)  # Line does not have a timestamp
-                else:
-                    synced_lyrics.append(line)
-                    line_mapping.append(False)
-    
-            # Dynamic adjustment of timings
-            for i, original_time in enumerate(original_timings):
-                # Find the nearest beat
-                while current_beat_index < len(beat_times) - 1 and beat_times[current_beat_index] < original_time:
-                    current_beat_index += 1
-    
-                # Align to nearest beat but ensure natural gaps
-                if i == 0:
-                    adjusted_time = beat_times[current_beat_index]
-                else:
-                    prev_time = adjusted_timings[-1]
-                    gap = original_timings[i] - original_timings[i - 1]
-    
-                    # Adjust the gap based on original timing and beats
-                    adjusted_time = max(
-                        prev_time + max(0.5, gap),  # Maintain a minimum gap of 0.5 seconds
-                        beat_times[current_beat_index - 1] if current_beat_index > 0 else beat_times[0]
-                    )
-    
-                # Ensure the adjusted time does not overlap with the next line
-                if i < len(original_timings) - 1:
-                    next_time = original_timings[i + 1]
-                    adjusted_time = min(adjusted_time, next_time - 0.5)  # Keep at least 0.5s before next line
-    
-                adjusted_timings.append(adjusted_time)
-    
-            # Rebuild the synced lyrics while preserving non-timed lines
-            synced_lyrics = []
-            timing_index = 0
-    
-            for has_timing, line in zip(line_mapping, self.lyrics):
-                if has_timing:
-                    adjusted_time = adjusted_timings[timing_index]
-                    new_minutes = int(adjusted_time // 60)
-                    new_seconds = adjusted_time % 60
-                    new_timestamp = f"[{new_minutes:02}:{new_seconds:05.2f}]"
-                    synced_lyrics.append(f"{new_timestamp}{lyrics_text[timing_index]}")
-                    timing_index += 1
-                else:
-                    synced_lyrics.append(line.strip())  # Preserve non-timed lines exactly
-    
-            # Update the LRC text box
-            self.lrc_text.delete(1.0, "end")
-            self.lrc_text.insert("end", "\n".join(synced_lyrics))
-            messagebox.showinfo("Success", "Timings have been dynamically synchronized.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to synchronize timings: {e}")
+        if self.worker is not None:
+            return  # Already running
+
+        self.worker = SyncWorker(self.audio_path, self.lyrics, self.profile.get())
+        self.worker.start()
+        self.sync_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.progress_bar["value"] = 0.0
+        self.status_label.config(text="Starting analysis...")
+        self.root.after(POLL_INTERVAL_MS, self.poll_worker, self.worker)
+
+    def cancel_sync(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            if self.worker.streaming is False:
+                # librosa.load and beat_track cannot be interrupted part way
+                self.status_label.config(text="Cancelling after the current step...")
+            else:
+                self.status_label.config(text="Cancelling...")
+
+    def poll_worker(self, worker):
+        """Tk-loop tick that drains the worker's messages into the progress bar."""
+        if worker is not self.worker:
+            return
+        if not self.progress_bar.winfo_exists():
+            # The tool was closed; let the analysis stop at its next block
+            worker.cancel()
+            self.worker = None
+            return
+
+        while True:
+            try:
+                message = worker.messages.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == "progress":
+                _, stage_name, fraction = message  # Not "stage": that is the profiling helper
+                start, end = STAGE_SPANS[stage_name]
+                self.progress_bar["value"] = start + (end - start) * fraction
+                if not worker.cancel_requested.is_set():
+                    self.status_label.config(text=f"{stage_name.capitalize()}... {fraction:.0%}")
+                continue
+
+            self.finish_sync()
+            if kind == "done":
+                # Update the LRC text box
+                with stage("smart_sync.render"):
+                    self.lrc_text.delete(1.0, "end")
+                    self.lrc_text.insert("end", message[1])
+                self.status_label.config(text="Done")
+                messagebox.showinfo("Success", "Timings have been dynamically synchronized.")
+            elif kind == "cancelled":
+                self.progress_bar["value"] = 0.0
+                self.status_label.config(text="Cancelled")
+            else:
+                self.status_label.config(text="Failed")
+                messagebox.showerror("Error", f"Failed to synchronize timings: {message[1]}")
+            return
+
+        self.root.after(POLL_INTERVAL_MS, self.poll_worker, worker)
+
+    def finish_sync(self):
+        self.worker = None
+        self.sync_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
 
 
     def save_lrc(self):
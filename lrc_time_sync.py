@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import os
+from lrc_document import LRCDocument
+from lrc_transforms import Quantize
 
 
 class LRCTimeSync:
@@ -48,39 +50,13 @@ class LRCTimeSync:
             messagebox.showerror("Error", f"Failed to load LRC file: {e}")
 
     def sync_timings(self):
-        lines = self.lrc_text.get("1.0", tk.END).split("\n")
-        synced_lines = []
-        valid_intervals = [0.00, 0.20, 0.40, 0.60, 0.80]  # Valid intervals
-    
-        for line in lines:
-            if line.startswith("[") and "]" in line:
-                try:
-                    # Extract the timestamp and the text
-                    timestamp, text = line.split("]", 1)
-                    minutes, seconds = map(float, timestamp[1:].split(":"))
-                    full_seconds = int(seconds)
-                    milliseconds = seconds - full_seconds
-                    
-                    # Find the closest valid interval
-                    closest_interval = min(valid_intervals, key=lambda x: abs(x - milliseconds))
-                    new_seconds = full_seconds + closest_interval
-                    new_minutes = int(minutes)
-                    
-                    # If new_seconds reaches 60, adjust minutes and seconds
-                    if new_seconds >= 60:
-                        new_minutes += 1
-                        new_seconds -= 60
-                    
-                    # Format the new timestamp
-                    new_timestamp = f"[{new_minutes:02}:{new_seconds:05.2f}]"
-                    synced_lines.append(f"{new_timestamp}{text}")
-                except Exception:
-                    synced_lines.append(line)  # If parsing fails, keep the line as is
-            else:
-                synced_lines.append(line)
-    
+        document = LRCDocument.parse(self.lrc_text.get("1.0", "end-1c"))
+
+        # Snap every timestamp to the nearest 0.20s step; minutes carry over automatically
+        document.transform(Quantize(200))
+
         self.lrc_text.delete(1.0, tk.END)
-        self.lrc_text.insert(tk.END, "\n".join(synced_lines))
+        self.lrc_text.insert(tk.END, document.dumps())
         messagebox.showinfo("Success", "LRC timings have been synchronized!")
 
 
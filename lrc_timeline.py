@@ -0,0 +1,64 @@
+"""Which lyric line is active at a given time: a sorted index over LRC timestamps.
+
+Every timestamp is one entry, so a multi-timestamp line such as
+``[00:10.00][00:42.00]chorus`` becomes active at each of its times. A line
+stays active until the next timestamp of any line. Lookups are a binary
+search, O(log n); many positions at once go through numpy in one call.
+Building the index is the only O(n log n) step, so it belongs where the
+timestamps change, not in a playback tick.
+"""
+from array import array
+from bisect import bisect_right
+
+
+class Timeline:
+    """Timestamps (ms) sorted ascending, with the line index each one belongs to.
+
+    Entries with equal times keep their document order, so the later line
+    of a tie is the one reported active.
+    """
+
+    def __init__(self, times_ms, lines):
+        order = sorted(range(len(times_ms)), key=times_ms.__getitem__)
+        self.times = array("i", [times_ms[i] for i in order])
+        self.lines = array("i", [lines[i] for i in order])
+
+    @classmethod
+    def from_document(cls, document):
+        """Index every line timestamp of an LRCDocument."""
+        return cls(document.times, document.line_index_of_times())
+
+    @classmethod
+    def from_line_times(cls, times_ms):
+        """Index one time per line; None marks a line without a timestamp."""
+        lines = [index for index, ms in enumerate(times_ms) if ms is not None]
+        return cls([times_ms[index] for index in lines], lines)
+
+    def __len__(self):
+        return len(self.times)
+
+    def entry_at(self, ms):
+        """Position in ``times`` of the timestamp active at ms, or -1 before the first one."""
+        return bisect_right(self.times, ms) - 1
+
+    def line_at(self, ms):
+        """Index of the line active at ms, or None before the first timestamp."""
+        entry = bisect_right(self.times, ms) - 1
+        return self.lines[entry] if entry >= 0 else None
+
+    def next_change(self, ms):
+        """Time (ms) of the first timestamp after ms, or None once the last one has passed."""
+        entry = bisect_right(self.times, ms)
+        return self.times[entry] if entry < len(self.times) else None
+
+    def lines_at(self, positions_ms):
+        """Active line of every position in one vectorized search; -1 before the first timestamp."""
+        import numpy as np
+
+        positions = np.asarray(positions_ms)
+        if not len(self.times):
+            return np.full(positions.shape, -1, dtype=np.int32)
+        times = np.frombuffer(self.times, dtype=np.int32)
+        lines = np.frombuffer(self.lines, dtype=np.int32)
+        entries = np.searchsorted(times, positions, side="right") - 1
+        return np.where(entries >= 0, lines[np.maximum(entries, 0)], -1)
@@ -1,6 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import re
+from lrc_document import LRCDocument
+from lrc_transforms import Offset
+from lrc_profiling import stage
 
 
 class LRCTimingAdjuster:
@@ -13,7 +16,7 @@ class LRCTimingAdjuster:
         self.setup_menu_callback = setup_menu_callback
         self.setup_menu_callback()
 
-        self.lrc_lines = []  # Store LRC file lines
+        self.document = None  # Parsed LRC file
         self.setup_ui()
 
     def setup_ui(self):
@@ -41,14 +44,14 @@ class LRCTimingAdjuster:
     def load_lrc_file(self):
         file_path = filedialog.askopenfilename(filetypes=[("LRC Files", "*.lrc")])
         if file_path:
-            with open(file_path, "r", encoding="utf-8") as file:
-                self.lrc_lines = file.readlines()
+            with stage("timing_adjuster.load", path=file_path):
+                self.document = LRCDocument.load(file_path)
             self.lrc_label.config(text=f"Loaded: {file_path.split('/')[-1]}")
         else:
             messagebox.showerror("Error", "No file selected.")
 
     def adjust_timing(self):
-        if not self.lrc_lines:
+        if not self.document:
             messagebox.showerror("Error", "No LRC file loaded.")
             return
     
@@ -57,39 +60,20 @@ class LRCTimingAdjuster:
             messagebox.showerror("Error", "Invalid offset time format. Use +/-00:00.00.")
             return
     
-        offset_ms = self.time_to_milliseconds(offset_time)
-        adjusted_lines = []
-    
-        # Regex to match timestamps
-        timestamp_regex = r"\[(\d+):(\d+\.\d+)\]"
-    
-        for line in self.lrc_lines:
-            matches = re.findall(timestamp_regex, line)
-            adjusted_line = line
-    
-            for match in matches:
-                original_time = self.time_to_milliseconds(f"{match[0]}:{match[1]}")
-                new_time = original_time + offset_ms
-                new_time = max(new_time, 0)  # Prevent negative timestamps
-                new_timestamp = self.milliseconds_to_time(new_time)
-    
-                # Replace the original timestamp with the adjusted timestamp
-                adjusted_line = adjusted_line.replace(f"[{match[0]}:{match[1]}]", f"[{new_timestamp}]")
-    
-            adjusted_lines.append(adjusted_line)
-    
-        self.lrc_lines = adjusted_lines
+        # Shift every timestamp of the parsed document (negative results clamp to zero)
+        with stage("timing_adjuster.offset", lines=len(self.document)):
+            self.document.transform(Offset(self.time_to_milliseconds(offset_time)))
         self.adjustment_label.config(text="Timing adjusted successfully!")
 
     def save_adjusted_lrc(self):
-        if not self.lrc_lines:
+        if not self.document:
             messagebox.showerror("Error", "No adjusted LRC data to save.")
             return
 
         file_path = filedialog.asksaveasfilename(defaultextension=".lrc", filetypes=[("LRC Files", "*.lrc")])
         if file_path:
-            with open(file_path, "w", encoding="utf-8") as file:
-                file.writelines(self.lrc_lines)
+            with stage("timing_adjuster.save", path=file_path):
+                self.document.save(file_path)
             messagebox.showinfo("Saved", f"LRC saved at {file_path}")
 
     @staticmethod
@@ -106,11 +90,3 @@ class LRCTimingAdjuster:
         seconds, milliseconds = seconds.split(".")
         total_ms = int(minutes) * 60000 + int(seconds) * 1000 + int(milliseconds) * 10
         return -total_ms if is_negative else total_ms
-
-    @staticmethod
-    def milliseconds_to_time(milliseconds):
-        """Convert milliseconds to 00:00.00 format."""
-        minutes = milliseconds // 60000
-        seconds = (milliseconds % 60000) // 1000
-        ms = (milliseconds % 1000) // 10
-        return f"{int(minutes):02}:{int(seconds):02}.{int(ms):02}"
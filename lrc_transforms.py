@@ -0,0 +1,238 @@
+"""Vectorised timing transforms over whole timestamp arrays.
+
+Each transform maps a float64 array of milliseconds to a new one. Chains
+run through apply_transforms, which converts the document's integer array
+once, applies every step and rounds back to integer milliseconds once, so
+no precision is lost between steps.
+"""
+from array import array
+
+import numpy as np
+
+
+def is_pointwise(transform):
+    """True when a transform maps every time on its own, so it applies to word tags as well."""
+    return getattr(transform, "pointwise", True)
+
+
+class Offset:
+    """Constant shift, e.g. Offset(-1500) moves everything 1.5s earlier."""
+
+    def __init__(self, offset_ms):
+        self.offset_ms = offset_ms
+
+    def __call__(self, times):
+        return times + self.offset_ms
+
+
+class Scale:
+    """Linear drift correction: stretch times around an anchor point."""
+
+    def __init__(self, factor, anchor_ms=0):
+        self.factor = factor
+        self.anchor_ms = anchor_ms
+
+    def __call__(self, times):
+        return self.anchor_ms + (times - self.anchor_ms) * self.factor
+
+
+class Quantize:
+    """Round to the nearest step of a grid (200ms reproduces LRC Time Sync).
+
+    A time exactly between two steps goes to the earlier one, as LRC Time
+    Sync always did: 02.50 on a 200ms grid becomes 02.40.
+    """
+
+    def __init__(self, grid_ms, phase_ms=0):
+        self.grid_ms = grid_ms
+        self.phase_ms = phase_ms
+
+    def __call__(self, times):
+        steps = np.ceil((times - self.phase_ms) / self.grid_ms - 0.5)
+        return steps * self.grid_ms + self.phase_ms
+
+
+class SnapToBeats:
+    """Move each time to its nearest beat, optionally only within max_distance_ms."""
+
+    def __init__(self, beat_times_ms, max_distance_ms=None):
+        self.beats = np.sort(np.asarray(beat_times_ms, dtype=np.float64))
+        self.max_distance_ms = max_distance_ms
+
+    def __call__(self, times):
+        if not len(self.beats):
+            return times
+        if len(self.beats) == 1:
+            nearest = np.full_like(times, self.beats[0])
+            return self._limit(nearest, times)
+        right = np.clip(np.searchsorted(self.beats, times), 1, len(self.beats) - 1)
+        left = right - 1
+        use_right = np.abs(self.beats[right] - times) < np.abs(times - self.beats[left])
+        return self._limit(self.beats[np.where(use_right, right, left)], times)
+
+    def _limit(self, nearest, times):
+        if self.max_distance_ms is None:
+            return nearest
+        return np.where(np.abs(nearest - times) <= self.max_distance_ms, nearest, times)
+
+
+class BeatAlign:
+    """LRC Smart Sync alignment: follow the beat grid while keeping natural gaps.
+
+    Times are processed in chronological order. Each one starts from the beat
+    just before it, never comes sooner than min_gap_ms (or the original gap)
+    after the previous aligned time and stays min_gap_ms ahead of the next
+    original time.
+    """
+
+    pointwise = False  # Gaps depend on the neighbouring times
+
+    def __init__(self, beat_times_ms, min_gap_ms=500):
+        self.beats = np.sort(np.asarray(beat_times_ms, dtype=np.float64))
+        self.min_gap_ms = min_gap_ms
+
+    def __call__(self, times):
+        if not len(self.beats) or not len(times):
+            return times
+        order = np.argsort(times, kind="stable")
+        original = times[order]
+
+        # First beat at or after each time (the old forward-only while loop)
+        index = np.minimum(np.searchsorted(self.beats, original, side="left"), len(self.beats) - 1)
+        index = np.maximum.accumulate(index)
+        floor = self.beats[np.maximum(index - 1, 0)]
+        gaps = np.maximum(self.min_gap_ms, np.diff(original, prepend=original[0]))
+        ceiling = np.append(original[1:] - self.min_gap_ms, np.inf)
+
+        adjusted = np.empty_like(original)
+        previous = self.beats[index[0]]
+        floor, gaps, ceiling = floor.tolist(), gaps.tolist(), ceiling.tolist()
+        for i in range(len(original)):
+            value = previous if i == 0 else max(previous + gaps[i], floor[i])
+            previous = adjusted[i] = min(value, ceiling[i])
+
+        result = np.empty_like(times)
+        result[order] = adjusted
+        return result
+
+
+class BandedBeatAlign:
+    """Globally optimal beat alignment: the least total movement onto beats.
+
+    Every time (in chronological order) is mapped to a beat within band_ms
+    of it, or left where it is at a cost of band_ms. The mapping keeps the
+    order and at least min_gap_ms between consecutive times (or their
+    original gap, if that was smaller), and minimises the summed distance
+    from the originals. Unlike BeatAlign, one badly placed line cannot push
+    the lines after it away from their originals.
+
+    Dynamic programming over each time's candidates: with k beats per band
+    the cost is O(n k log k) for n times, so 10k lines over 50k beats stays
+    well under a second.
+    """
+
+    pointwise = False  # Gaps depend on the neighbouring times
+
+    def __init__(self, beat_times_ms, min_gap_ms=500, band_ms=2000):
+        self.beats = np.sort(np.asarray(beat_times_ms, dtype=np.float64))
+        self.min_gap_ms = min_gap_ms
+        self.band_ms = band_ms
+
+    def candidates(self, original):
+        """Per time: a row of candidate times (beats in the band, then the original), padded with inf."""
+        low = np.searchsorted(self.beats, original - self.band_ms, side="left")
+        high = np.searchsorted(self.beats, original + self.band_ms, side="right")
+        width = int((high - low).max(initial=0)) + 1
+        columns = np.arange(width - 1)
+        index = low[:, None] + columns[None, :]
+        inside = index < high[:, None]
+        rows = np.full((len(original), width), np.inf)
+        rows[:, :-1] = np.where(inside, self.beats[np.minimum(index, len(self.beats) - 1)], np.inf)
+        rows[:, -1] = original
+        costs = np.abs(rows - original[:, None])
+        costs[:, -1] = self.band_ms
+        costs[~np.isfinite(rows)] = np.inf
+
+        # Candidates in ascending time, so predecessors can be found with searchsorted
+        order = np.argsort(rows, axis=1, kind="stable")
+        return np.take_along_axis(rows, order, axis=1), np.take_along_axis(costs, order, axis=1)
+
+    def __call__(self, times):
+        if not len(self.beats) or not len(times):
+            return times
+        order = np.argsort(times, kind="stable")
+        original = times[order]
+        gaps = np.minimum(self.min_gap_ms, np.diff(original, prepend=original[0]))
+        rows, costs = self.candidates(original)
+
+        # total[j]: least cost of the times so far with the current one on rows[i, j]
+        total = costs[0]
+        back = np.zeros(rows.shape, dtype=np.int32)
+        for i in range(1, len(original)):
+            # Best predecessor at or before each earlier candidate (prefix minimum)
+            best = np.minimum.accumulate(total)
+            best_at = np.maximum.accumulate(np.where(total == best, np.arange(len(total)), 0))
+            # Last earlier candidate leaving at least the gap
+            limit = np.searchsorted(rows[i - 1], rows[i] - gaps[i], side="right") - 1
+            reachable = limit >= 0
+            safe = np.maximum(limit, 0)
+            total = np.where(reachable, best[safe] + costs[i], np.inf)
+            back[i] = best_at[safe]
+
+        chosen = np.empty(len(original), dtype=np.intp)
+        chosen[-1] = int(np.argmin(total))
+        for i in range(len(original) - 1, 0, -1):
+            chosen[i - 1] = back[i, chosen[i]]
+        adjusted = rows[np.arange(len(original)), chosen]
+
+        result = np.empty_like(times)
+        result[order] = adjusted
+        return result
+
+
+def as_millisecond_view(times):
+    """Zero-copy int32 numpy view of an array('i'); other inputs go through np.asarray."""
+    if isinstance(times, array) and times.itemsize == 4:
+        return np.frombuffer(times, dtype=np.int32)
+    return np.asarray(times)
+
+
+def apply_transforms(times, *transforms):
+    """Apply a chain of transforms to integer-millisecond timestamps in place.
+
+    times may be an array('i') (e.g. LRCDocument.times) or a numpy array.
+    Results are rounded once at the end and clamped at zero.
+    """
+    values = as_millisecond_view(times)
+    if not len(values) or not transforms:
+        return times
+
+    work = values.astype(np.float64)
+    for transform in transforms:
+        work = transform(work)
+    result = np.maximum(np.floor(work + 0.5), 0)
+
+    if isinstance(times, array) and times.itemsize != 4:
+        times[:] = array(times.typecode, result.astype(np.int64).tolist())
+    else:
+        values[:] = result
+    return times
+
+
+def follow_anchors(times, anchors, anchors_before, anchors_after):
+    """Shift times in place by how far their anchor moved: anchors_after - anchors_before.
+
+    anchors holds, for each entry of times, an index into the anchor arrays
+    (used to move enhanced-LRC word tags along with their line timestamp).
+    """
+    values = as_millisecond_view(times)
+    if not len(values):
+        return times
+    index = np.asarray(anchors, dtype=np.intp)
+    delta = as_millisecond_view(anchors_after)[index].astype(np.int64) - as_millisecond_view(anchors_before)[index]
+    result = np.maximum(values + delta, 0)
+    if isinstance(times, array) and times.itemsize != 4:
+        times[:] = array(times.typecode, result.tolist())
+    else:
+        values[:] = result
+    return times
@@ -1,10 +1,7 @@
-import warnings
-import re
-import pykakasi
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import tkinter as tk
-
-warnings.filterwarnings("ignore", category=DeprecationWarning)
+from romaji_engine import convert_text
+from lrc_profiling import stage
 
 
 class RomajiConverter:
@@ -122,46 +119,17 @@ class RomajiConverter:
 
         # Perform conversion
         try:
-            converted_text = self.convert_to_romaji_with_contextual_replacements(input_text)
-            self.output_text.config(state="normal")
-            self.output_text.delete("1.0", tk.END)
-            self.output_text.insert("1.0", converted_text)
-            self.output_text.config(state="disabled")
+            with stage("romaji.convert", chars=len(input_text)):
+                converted_text = self.convert_to_romaji_with_contextual_replacements(input_text)
+            with stage("romaji.render"):
+                self.output_text.config(state="normal")
+                self.output_text.delete("1.0", tk.END)
+                self.output_text.insert("1.0", converted_text)
+                self.output_text.config(state="disabled")
         except Exception as e:
             messagebox.showerror("Error", f"Conversion failed: {e}")
 
     @staticmethod
     def convert_to_romaji_with_contextual_replacements(text):
-        kakasi = pykakasi.kakasi()
-        kakasi.setMode("H", "a")  # Hiragana to ascii
-        kakasi.setMode("K", "a")  # Katakana to ascii
-        kakasi.setMode("J", "a")  # Japanese to ascii
-        kakasi.setMode("r", "Hepburn")  # Use Hepburn Romanization
-        kakasi.setMode("s", True)  # Enable word segmentation
-        converter = kakasi.getConverter()
-
-        lines = text.splitlines()
-        romaji_lines = []
-
-        for line in lines:
-            words = line.split()
-            converted_line = []
-            for word in words:
-                converted_word = converter.do(word)
-                converted_line.append(converted_word)
-
-            romaji_line = " ".join(converted_line)
-
-            # Apply replacement rules
-            romaji_line = re.sub(r'\bha\b', 'wa', romaji_line)
-            romaji_line = re.sub(r'(?<!\S)ha(?!\S)', 'wa', romaji_line)
-            romaji_line = re.sub(r'(?<=\w)ha(?=\s|$)', lambda m: m.group(0).replace('ha', 'wa'), romaji_line)
-            romaji_line = re.sub(r'\bashita\b', 'asu', romaji_line)
-            romaji_line = re.sub(r'\bkun\b', 'kimi', romaji_line)
-
-            # Replace punctuation with a consistent format
-            romaji_line = romaji_line.replace("。", ".")
-
-            romaji_lines.append(romaji_line)
-
-        return "\n".join(romaji_lines)
+        # The converter is shared and lines are memoised, so repeated choruses convert once
+        return convert_text(text)
@@ -0,0 +1,92 @@
+"""Japanese to Romaji conversion shared by the Romaji Converter and batch jobs.
+
+The pykakasi converter is built once per process and reused. Lines and
+words are memoised, so repeated choruses are only converted once.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from romaji_rules import default_engine
+
+# Below this many lines a process pool costs more than it saves
+PARALLEL_MIN_LINES = 2000
+
+_kakasi = None
+
+
+def get_kakasi():
+    """The process-wide pykakasi converter."""
+    global _kakasi
+    if _kakasi is None:
+        import pykakasi
+        _kakasi = pykakasi.kakasi()
+    return _kakasi
+
+
+# Opening brackets belong to the word after them; other punctuation to the word before
+OPENING_PUNCTUATION = "「『（【〈《〔［｛“‘"
+
+
+@lru_cache(maxsize=65536)
+def convert_word(word):
+    """Hepburn romanisation of one whitespace-separated word.
+
+    Punctuation keeps its original character, as the old converter did
+    ('！' and '、' stay full-width rather than becoming '!' and ','). It is
+    joined to the word it belongs to, so "君が好き！" gives "kun ga suki！"
+    and "「愛」" gives "「ai」".
+    """
+    parts = []
+    opening = ""
+    for item in get_kakasi().convert(word):
+        text = item["hepburn"].strip()
+        if not text:
+            continue
+        if not any(char.isalnum() for char in text):
+            text = item["orig"].strip()
+            if text in OPENING_PUNCTUATION:
+                opening += text
+                continue
+            if parts:
+                parts[-1] += text
+                continue
+        parts.append(opening + text)
+        opening = ""
+    if opening:
+        parts.append(opening)
+    return " ".join(parts)
+
+
+@lru_cache(maxsize=8192)
+def convert_line(line):
+    """Convert one lyric line and apply the contextual replacement rules."""
+    romaji_line = " ".join(convert_word(word) for word in line.split())
+
+    # Apply replacement rules (romaji_rules.json) in a single scan
+    romaji_line = default_engine().apply(romaji_line)
+
+    # Replace punctuation with a consistent format
+    return romaji_line.replace("。", ".")
+
+
+def convert_text(text):
+    """Convert multi-line lyrics, line by line."""
+    return "\n".join(convert_line(line) for line in text.splitlines())
+
+
+def convert_many(texts, workers=None):
+    """Convert a list of lyric texts (e.g. a whole discography).
+
+    Large inputs are spread over worker processes; each worker builds its
+    own converter once and keeps its memo for every song it receives.
+    """
+    texts = list(texts)
+    total_lines = sum(text.count("\n") + 1 for text in texts)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(texts) < 2 or total_lines < PARALLEL_MIN_LINES:
+        return [convert_text(text) for text in texts]
+
+    chunksize = max(1, len(texts) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(convert_text, texts, chunksize=chunksize))
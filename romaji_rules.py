@@ -0,0 +1,122 @@
+"""Contextual replacement rules applied to converted Romaji.
+
+Rules are a JSON list of objects:
+
+    {"match": "ha", "replace": "wa", "before": "\\b", "after": "(?=\\s|$)"}
+
+"match" is a literal. "before" and "after" are optional zero-width regex
+conditions checked at the start and end of the literal (lookbehinds and
+lookaheads, \\b, ...). All literals are compiled into one trie-shaped
+regex, so a line is scanned once however many rules there are. Where
+several rules fit at one position the longest literal wins, then file
+order.
+"""
+import json
+import os
+import re
+import sys
+
+from disk_cache import app_data_dir
+
+BASE_DIR = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RULES_PATH = os.path.join(BASE_DIR, "romaji_rules.json")
+USER_RULES_NAME = "romaji_rules.json"
+
+
+def trie_pattern(words):
+    """Regex source matching any of the words, with shared prefixes factored out."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        ends = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class ReplacementRule:
+    def __init__(self, match, replace, before=None, after=None):
+        self.match = match
+        self.replace = replace
+        self.before = re.compile(before) if before else None
+        self.after = re.compile(after) if after else None
+
+    def accepts(self, line, start, end):
+        if self.before and not self.before.match(line, start):
+            return False
+        return not self.after or bool(self.after.match(line, end))
+
+
+class RuleEngine:
+    """Applies a rule set to a line in a single left-to-right scan."""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.by_literal = {}
+        for rule in self.rules:
+            self.by_literal.setdefault(rule.match, []).append(rule)
+        self.lengths = sorted({len(literal) for literal in self.by_literal}, reverse=True)
+        self.pattern = re.compile(trie_pattern(self.by_literal)) if self.by_literal else None
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r", encoding="utf-8") as file:
+            entries = json.load(file)
+        return cls(
+            ReplacementRule(entry["match"], entry["replace"], entry.get("before"), entry.get("after"))
+            for entry in entries
+        )
+
+    def _rule_at(self, line, start):
+        """The first rule whose literal and context fit at start, longest literal first."""
+        for length in self.lengths:
+            end = start + length
+            for rule in self.by_literal.get(line[start:end], ()):
+                if rule.accepts(line, start, end):
+                    return rule, end
+        return None, start
+
+    def apply(self, line):
+        if self.pattern is None:
+            return line
+        pieces = []
+        last = 0
+        match = self.pattern.search(line)
+        while match:
+            start = match.start()
+            rule, end = self._rule_at(line, start)
+            if rule:
+                pieces.append(line[last:start])
+                pieces.append(rule.replace)
+                last = end
+                match = self.pattern.search(line, end)
+            else:
+                match = self.pattern.search(line, start + 1)
+        if not pieces:
+            return line
+        pieces.append(line[last:])
+        return "".join(pieces)
+
+
+_default_engine = None
+
+
+def default_engine():
+    """Rules from the user's data directory if present, otherwise the bundled set."""
+    global _default_engine
+    if _default_engine is None:
+        user_rules = os.path.join(app_data_dir(), USER_RULES_NAME)
+        path = user_rules if os.path.exists(user_rules) else DEFAULT_RULES_PATH
+        _default_engine = RuleEngine.from_file(path)
+    return _default_engine
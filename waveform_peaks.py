@@ -0,0 +1,205 @@
+"""Multi-resolution min/max peaks of an audio file for drawing its waveform.
+
+Level 0 holds the minimum and maximum sample of every BASE_BUCKET_SECONDS
+bucket; each further level halves the resolution. A view of any time range
+at any width reads from the coarsest level that still has at least one
+bucket per pixel, so it costs O(width) however long the track is. Peaks are
+computed once per audio content, block by block, and cached on disk.
+"""
+import math
+import os
+import queue
+import threading
+
+import numpy as np
+
+from disk_cache import DiskCache, cache_key, file_fingerprint
+from lrc_beat_analysis import AnalysisCancelled, can_stream, report
+from lrc_profiling import stage
+
+# Bump when the peak computation changes so stale cache entries are ignored
+PEAKS_VERSION = 1
+
+BASE_BUCKET_SECONDS = 0.005  # Finest level; zooming to 10ms per pixel still reads real peaks
+TOP_LEVEL_BUCKETS = 256      # Stop halving once a level is this small
+BLOCK_SECONDS = 10.0         # Decoded per step
+
+STAGE_PEAKS = "peaks"
+
+peak_cache = DiskCache("peaks", max_bytes=256 * 1024 * 1024)
+
+
+class PeakPyramid:
+    """Min/max peaks at halving resolutions; levels[k] buckets span bucket_seconds * 2**k."""
+
+    def __init__(self, levels, bucket_seconds, duration):
+        self.levels = levels  # [(mins, maxs)] float32 arrays in [-1, 1]
+        self.bucket_seconds = bucket_seconds
+        self.duration = duration
+
+    @classmethod
+    def from_base(cls, mins, maxs, bucket_seconds, duration):
+        levels = [(mins, maxs)]
+        while len(mins) > TOP_LEVEL_BUCKETS:
+            if len(mins) % 2:
+                mins, maxs = np.append(mins, mins[-1]), np.append(maxs, maxs[-1])
+            mins = mins.reshape(-1, 2).min(axis=1)
+            maxs = maxs.reshape(-1, 2).max(axis=1)
+            levels.append((mins, maxs))
+        return cls(levels, bucket_seconds, duration)
+
+    def columns(self, start, end, width):
+        """(mins, maxs) with one value per pixel column for the time range [start, end)."""
+        width = max(int(width), 1)
+        seconds_per_pixel = max(end - start, 1e-9) / width
+        level = int(math.floor(math.log2(max(seconds_per_pixel / self.bucket_seconds, 1.0))))
+        level = min(level, len(self.levels) - 1)
+        mins, maxs = self.levels[level]
+        bucket = self.bucket_seconds * 2 ** level
+
+        # Bucket range [first, stop) of every pixel column; at least the bucket it starts in
+        edges = np.floor((start + np.arange(width + 1) * seconds_per_pixel) / bucket).astype(np.int64)
+        first = edges[:-1]
+        stop = np.minimum(np.maximum(edges[1:], first + 1), len(mins))
+        column_mins = np.zeros(width, dtype=np.float32)
+        column_maxs = np.zeros(width, dtype=np.float32)
+        if not len(mins):
+            return column_mins, column_maxs
+
+        # The chosen level has one or two buckets per pixel, so this loops once or twice
+        span = int((stop - first).max(initial=0))
+        column_mins[:] = np.inf
+        column_maxs[:] = -np.inf
+        for offset in range(span):
+            index = first + offset
+            valid = (index >= 0) & (index < stop)
+            safe = np.clip(index, 0, len(mins) - 1)
+            column_mins = np.where(valid, np.minimum(column_mins, mins[safe]), column_mins)
+            column_maxs = np.where(valid, np.maximum(column_maxs, maxs[safe]), column_maxs)
+        outside = ~np.isfinite(column_mins)
+        column_mins[outside] = 0.0
+        column_maxs[outside] = 0.0
+        return column_mins, column_maxs
+
+
+def sample_blocks(audio_path):
+    """(sample rate, iterator of mono float32 blocks); streamed when libsndfile can read the file."""
+    if can_stream(audio_path):
+        import soundfile
+
+        info = soundfile.info(audio_path)
+        blocks = soundfile.blocks(audio_path, blocksize=int(BLOCK_SECONDS * info.samplerate),
+                                  dtype="float32", always_2d=True)
+        return info.samplerate, (block.mean(axis=1, dtype=np.float32) for block in blocks)
+
+    import librosa
+
+    y, sr = librosa.load(audio_path, sr=None, mono=True)
+    step = int(BLOCK_SECONDS * sr)
+    return sr, (y[i:i + step] for i in range(0, len(y), step))
+
+
+def compute_peaks(audio_path, progress=None):
+    """Build the PeakPyramid of an audio file; progress(STAGE_PEAKS, fraction) may cancel."""
+    import librosa
+
+    duration = librosa.get_duration(path=audio_path)
+    sr, blocks = sample_blocks(audio_path)
+    bucket_samples = max(1, int(round(BASE_BUCKET_SECONDS * sr)))
+
+    mins, maxs = [], []
+    carry = np.zeros(0, dtype=np.float32)
+    done = 0
+    report(progress, STAGE_PEAKS, 0.0)
+    for block in blocks:
+        done += len(block)
+        samples = np.concatenate([carry, block])
+        whole = len(samples) // bucket_samples * bucket_samples
+        buckets = samples[:whole].reshape(-1, bucket_samples)
+        mins.append(buckets.min(axis=1))
+        maxs.append(buckets.max(axis=1))
+        carry = samples[whole:]
+        report(progress, STAGE_PEAKS, min(done / max(duration * sr, 1.0), 1.0))
+    if len(carry):
+        mins.append(carry.min(keepdims=True))
+        maxs.append(carry.max(keepdims=True))
+
+    empty = np.zeros(0, dtype=np.float32)
+    return PeakPyramid.from_base(
+        np.concatenate(mins) if mins else empty,
+        np.concatenate(maxs) if maxs else empty,
+        bucket_samples / sr,
+        duration,
+    )
+
+
+def peaks_key(audio_path):
+    return cache_key(file_fingerprint(audio_path), "peaks", BASE_BUCKET_SECONDS, PEAKS_VERSION)
+
+
+def load_cached(key):
+    path = peak_cache.get(key, ".npz")
+    if not path:
+        return None
+    try:
+        with np.load(path) as data:
+            return PeakPyramid.from_base(
+                data["mins"], data["maxs"], float(data["bucket_seconds"]), float(data["duration"])
+            )
+    except (OSError, ValueError, KeyError):
+        return None  # Corrupt entry, compute again
+
+
+def store_cached(key, pyramid):
+    # Only the finest level is stored; the others rebuild from it in milliseconds
+    mins, maxs = pyramid.levels[0]
+    temp_path = peak_cache.temp_path(".npz")
+    try:
+        np.savez(temp_path, mins=mins, maxs=maxs, bucket_seconds=pyramid.bucket_seconds,
+                 duration=pyramid.duration)
+        peak_cache.commit(temp_path, key, ".npz")
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def load_peaks(audio_path, use_cache=True, progress=None):
+    """PeakPyramid for an audio file, served from the on-disk cache when possible."""
+    if use_cache:
+        with stage("peaks.cache_lookup"):
+            key = peaks_key(audio_path)
+            pyramid = load_cached(key)
+        if pyramid is not None:
+            return pyramid
+    with stage("peaks.compute", path=audio_path):
+        pyramid = compute_peaks(audio_path, progress)
+    if use_cache:
+        store_cached(key, pyramid)
+    return pyramid
+
+
+class PeakWorker(threading.Thread):
+    """Loads peaks off the Tk thread; posts ("progress", stage, fraction),
+    ("done", pyramid), ("cancelled",) or ("error", exception) to self.messages."""
+
+    def __init__(self, audio_path):
+        super().__init__(daemon=True)
+        self.audio_path = audio_path
+        self.messages = queue.Queue()
+        self.cancel_requested = threading.Event()
+
+    def progress(self, stage, fraction):
+        if self.cancel_requested.is_set():
+            raise AnalysisCancelled()
+        self.messages.put(("progress", stage, fraction))
+
+    def cancel(self):
+        self.cancel_requested.set()
+
+    def run(self):
+        try:
+            self.messages.put(("done", load_peaks(self.audio_path, progress=self.progress)))
+        except AnalysisCancelled:
+            self.messages.put(("cancelled",))
+        except Exception as e:
+            self.messages.put(("error", e))
@@ -0,0 +1,198 @@
+"""Waveform overview for the LRC Generator, with draggable line markers.
+
+The waveform is one polygon whose points are recomputed from the peak
+pyramid on every zoom or scroll, so redraws cost O(canvas width) whatever
+the track length. Markers are one vertical line per timestamped lyric line;
+dragging one retimes that line through the on_retime callback, and a
+double click asks for playback from that point through on_seek.
+"""
+import queue
+
+WAVE_FILL = "#795548"
+MARKER_COLOR = "#FF7043"
+MARKER_ACTIVE_COLOR = "#FFD54F"
+BACKGROUND = "#FFF8E1"
+MARKER_TAG = "marker"
+MIN_VISIBLE_SECONDS = 2.0  # Closest zoom: a few ms per pixel
+ZOOM_STEP = 1.25
+POLL_INTERVAL_MS = 50
+
+
+class WaveformView:
+    """Draws a PeakPyramid on a Tk canvas and lets markers be dragged to retime lines.
+
+    on_retime(index, ms) is called when a marker for lyric line index is
+    dropped at a new time; on_seek(ms) on a double click.
+    """
+
+    def __init__(self, canvas, on_retime=None, on_seek=None):
+        self.canvas = canvas
+        self.on_retime = on_retime
+        self.on_seek = on_seek
+        self.pyramid = None
+        self.worker = None
+        self.start = 0.0   # Visible range in seconds
+        self.end = 1.0
+        self.times_ms = []
+        self.dragging = None  # (line index, canvas item) while a marker is dragged
+        self.pan_anchor = None
+
+        canvas.config(background=BACKGROUND, highlightthickness=0)
+        self.wave = canvas.create_polygon(0, 0, 0, 0, fill=WAVE_FILL, outline=WAVE_FILL)
+        self.message = canvas.create_text(8, 8, anchor="nw", text="", fill=WAVE_FILL)
+        canvas.bind("<Configure>", lambda event: self.redraw())
+        canvas.bind("<MouseWheel>", self.on_wheel)
+        canvas.bind("<Button-4>", lambda event: self.zoom(1 / ZOOM_STEP, event.x))
+        canvas.bind("<Button-5>", lambda event: self.zoom(ZOOM_STEP, event.x))
+        canvas.bind("<ButtonPress-1>", self.on_press)
+        canvas.bind("<B1-Motion>", self.on_motion)
+        canvas.bind("<ButtonRelease-1>", self.on_release)
+        canvas.bind("<Double-Button-1>", self.on_double_click)
+
+    # Loading
+
+    def load(self, audio_path):
+        """Compute (or fetch from the cache) the peaks of audio_path in the background."""
+        from waveform_peaks import PeakWorker  # numpy/librosa only once a file is opened
+
+        if self.worker is not None:
+            self.worker.cancel()
+        self.pyramid = None
+        self.redraw()
+        self.canvas.itemconfig(self.message, text="Loading waveform...")
+        self.worker = PeakWorker(audio_path)
+        self.worker.start()
+        self.canvas.after(POLL_INTERVAL_MS, self.poll_worker, self.worker)
+
+    def poll_worker(self, worker):
+        if worker is not self.worker:
+            return
+        if not self.canvas.winfo_exists():
+            worker.cancel()
+            self.worker = None
+            return
+
+        while True:
+            try:
+                message = worker.messages.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == "progress":
+                self.canvas.itemconfig(self.message, text=f"Loading waveform... {message[2]:.0%}")
+                continue
+            self.worker = None
+            if kind == "done":
+                self.pyramid = message[1]
+                self.start, self.end = 0.0, max(self.pyramid.duration, MIN_VISIBLE_SECONDS)
+                self.canvas.itemconfig(self.message, text="")
+                self.redraw()
+            elif kind == "error":
+                self.canvas.itemconfig(self.message, text=f"No waveform: {message[1]}")
+            return
+
+        self.canvas.after(POLL_INTERVAL_MS, self.poll_worker, worker)
+
+    # Coordinates
+
+    def width(self):
+        return max(self.canvas.winfo_width(), 1)
+
+    def x_of(self, seconds):
+        return (seconds - self.start) / (self.end - self.start) * self.width()
+
+    def seconds_at(self, x):
+        return self.start + x / self.width() * (self.end - self.start)
+
+    # Drawing
+
+    def redraw(self):
+        width = self.width()
+        height = max(self.canvas.winfo_height(), 1)
+        middle = height / 2
+        if self.pyramid is None:
+            self.canvas.coords(self.wave, 0, middle, width, middle)
+        else:
+            mins, maxs = self.pyramid.columns(self.start, self.end, width)
+            top = (middle - maxs * middle).tolist()
+            bottom = (middle - mins * middle).tolist()
+            points = []
+            for x, y in enumerate(top):
+                points += (x, y)
+            for x in range(width - 1, -1, -1):
+                points += (x, bottom[x])
+            self.canvas.coords(self.wave, *points)
+        self.draw_markers()
+
+    def set_markers(self, times_ms):
+        """Show one marker per timestamped line; times_ms holds None for untimed lines."""
+        self.times_ms = list(times_ms)
+        self.draw_markers()
+
+    def draw_markers(self):
+        self.canvas.delete(MARKER_TAG)
+        height = max(self.canvas.winfo_height(), 1)
+        for index, ms in enumerate(self.times_ms):
+            if ms is None or not self.start <= ms / 1000 <= self.end:
+                continue
+            x = self.x_of(ms / 1000)
+            self.canvas.create_line(
+                x, 0, x, height, fill=MARKER_COLOR, width=2, activefill=MARKER_ACTIVE_COLOR,
+                tags=(MARKER_TAG, f"line{index}"),
+            )
+
+    # Zoom and scroll
+
+    def zoom(self, factor, x):
+        """Scale the visible range by factor, keeping the time under pixel x in place."""
+        if self.pyramid is None:
+            return
+        pivot = self.seconds_at(x)
+        span = (self.end - self.start) * factor
+        span = min(max(span, MIN_VISIBLE_SECONDS), max(self.pyramid.duration, MIN_VISIBLE_SECONDS))
+        ratio = x / self.width()
+        self.scroll_to(pivot - span * ratio, span)
+
+    def scroll_to(self, start, span=None):
+        span = self.end - self.start if span is None else span
+        limit = max(self.pyramid.duration - span, 0.0) if self.pyramid else 0.0
+        self.start = min(max(start, 0.0), limit)
+        self.end = self.start + span
+        self.redraw()
+
+    def on_wheel(self, event):
+        self.zoom(1 / ZOOM_STEP if event.delta > 0 else ZOOM_STEP, event.x)
+
+    # Dragging: markers retime their line, the background scrolls
+
+    def on_press(self, event):
+        item = self.canvas.find_withtag("current")
+        tags = self.canvas.gettags(item[0]) if item else ()
+        if MARKER_TAG in tags:
+            index = next(int(tag[4:]) for tag in tags if tag.startswith("line"))
+            self.dragging = (index, item[0])
+        else:
+            self.pan_anchor = (event.x, self.start)
+
+    def on_motion(self, event):
+        if self.dragging is not None:
+            x = min(max(event.x, 0), self.width())
+            self.canvas.coords(self.dragging[1], x, 0, x, max(self.canvas.winfo_height(), 1))
+        elif self.pan_anchor is not None and self.pyramid is not None:
+            anchor_x, anchor_start = self.pan_anchor
+            self.scroll_to(anchor_start - (event.x - anchor_x) / self.width() * (self.end - self.start))
+
+    def on_release(self, event):
+        if self.dragging is not None:
+            index, _ = self.dragging
+            self.dragging = None
+            ms = max(int(round(self.seconds_at(min(max(event.x, 0), self.width())) * 1000)), 0)
+            self.times_ms[index] = ms
+            if self.on_retime:
+                self.on_retime(index, ms)
+            self.draw_markers()
+        self.pan_anchor = None
+
+    def on_double_click(self, event):
+        if self.on_seek and self.pyramid is not None:
+            self.on_seek(max(int(round(self.seconds_at(event.x) * 1000)), 0))